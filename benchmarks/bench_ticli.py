@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Benchmarks for ticli's own overhead.
+
+Measures option group decoration, instance construction, validated option
+assignment, validated method calls, chained dispatch, and package import
+time, using the examples as fixtures along with synthetic groups that have
+hundreds of options and methods.
+
+Usage:
+
+    ./bench_ticli.py --output results.json
+    ./bench_ticli.py --compare baseline.json [--threshold 1.25]
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import contextlib
+import subprocess
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_top = os.path.dirname(_here)
+sys.path.insert(0, _top)
+sys.path.insert(0, os.path.join(_top, "examples"))
+
+import ticli
+from ticli import option
+from ticli.dispatch import dispatch
+
+# Sizes of the synthetic groups
+small_size = (5, 5)
+large_size = (300, 200)
+
+# Construct a synthetic, undecorated class with the given number of int
+# options and methods
+def make_class(n_options, n_methods, name="Synthetic"):
+    ns = {
+        "__doc__": "Synthetic group.\n\nArgs:\n" + "".join(
+            f"  o{i}: option {i}\n" for i in range(n_options)),
+        "__annotations__": {f"o{i}": int for i in range(n_options)},
+    }
+    for i in range(n_options):
+        ns[f"o{i}"] = i
+    def make_method(j):
+        def m(self, x:int=0):
+            return option.next_in_chain_after(self)
+        m.__name__ = f"m{j}"
+        return m
+    for j in range(n_methods):
+        ns[f"m{j}"] = make_method(j)
+    return type(name, (), ns)
+
+def make_group(n_options, n_methods, name="Synthetic"):
+    return option.group(make_class(n_options, n_methods, name))
+
+# Return the best time per call, in seconds
+def measure(f, number=None, repeat=5):
+    timer = timeit.Timer(f)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def measure_import(runs=5):
+    env = dict(os.environ, PYTHONPATH=_top)
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import ticli"],
+                       check=True, env=env)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    baseline = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        elapsed = time.perf_counter() - start
+        baseline = elapsed if baseline is None else min(baseline, elapsed)
+    return max(best - baseline, 0.0)
+
+def run_benchmarks():
+    with contextlib.redirect_stdout(io.StringIO()):
+        import ex07_jump_or_greet_or_farewell as ex07
+        import ex08_jump_or_greet_or_farewell_chain as ex08
+        import ex10_multiple_inheritance as ex10
+    # The ex10 example turns on debug output, which is not being measured
+    ticli.disable_debug()
+
+    results = {}
+    sink = io.StringIO()
+    def quiet(f):
+        def g():
+            with contextlib.redirect_stdout(sink):
+                f()
+            sink.seek(0)
+            sink.truncate()
+        return g
+
+    # Decoration
+    for label, (n_options, n_methods) in [("small", small_size),
+                                          ("large", large_size)]:
+        results[f"decorate_{label}"] = measure(
+            lambda: make_group(n_options, n_methods), number=3 if
+            label == "large" else None)
+
+    # Construction
+    small = make_group(*small_size)
+    large = make_group(*large_size)
+    results["construct_small"] = measure(lambda: small())
+    results["construct_large"] = measure(lambda: large())
+    results["construct_large_kw"] = measure(lambda: large(o0=1, o299=2))
+    results["construct_ex10"] = measure(quiet(lambda: ex10.More_Extended()))
+
+    # Option assignment with validation
+    s = small()
+    g = large()
+    with contextlib.redirect_stdout(sink):
+        e = ex10.More_Extended()
+    def set_small():
+        s.o0 = 3
+    def set_large():
+        g.o299 = 3
+    def set_ex10():
+        e.a = 3
+    results["option_set_small"] = measure(set_small)
+    results["option_set_large"] = measure(set_large)
+    results["option_set_ex10"] = measure(set_ex10)
+    def get_large():
+        return g.o299
+    results["option_get_large"] = measure(get_large)
+
+    # Validated method calls
+    results["method_call_small"] = measure(lambda: s.m0(x=1))
+    results["method_call_large"] = measure(lambda: g.m199(x=1))
+
+    # Chained dispatch
+    def fallback(component, argv):
+        raise RuntimeError(f"unexpected fallback: {argv}")
+    top = ex08.Top(next_in_chain="self")
+    chain = "--verbose jump 3 - greet informal - farewell".split()
+    results["dispatch_chain_ex08"] = measure(
+        quiet(lambda: dispatch(top, chain, fallback)))
+    results["dispatch_command_ex07"] = measure(
+        quiet(lambda: dispatch(ex07.Top, ["farewell"], fallback)))
+    large_chain = []
+    for j in range(0, large_size[1], 10):
+        large_chain += [f"m{j}", "--x", "1", "-"]
+    g._next_in_chain = g
+    results["dispatch_chain_large"] = measure(
+        lambda: dispatch(g, large_chain, fallback))
+
+    # Package import
+    results["import_ticli"] = measure_import()
+    return results
+
+def compare(results, baseline, threshold):
+    slower = []
+    for name, seconds in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:28s} {seconds * 1e6:12.2f} us   (new)")
+            continue
+        ratio = seconds / base
+        flag = ""
+        if ratio > threshold:
+            flag = "  SLOWER"
+            slower.append(name)
+        print(f"{name:28s} {seconds * 1e6:12.2f} us   "
+              f"x{ratio:5.2f} vs {base * 1e6:.2f} us{flag}")
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split(
+        "\n")[0])
+    parser.add_argument("--output", help="write results to a JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print(f"slowdowns: {', '.join(slower)}")
+            sys.exit(1)
+    else:
+        for name, seconds in sorted(results.items()):
+            print(f"{name:28s} {seconds * 1e6:12.2f} us")
+
+if __name__ == '__main__':
+    main()
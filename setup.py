@@ -15,8 +15,11 @@ setup(
     include_package_data=True,
     install_requires=[
         #"fire", # optional, but must be codecraftsmen branch
-        "pydantic",
         "makefun",
         "decopatch",
     ],
+    extras_require={
+        # Needed for annotations the stdlib validation backend does not handle
+        "pydantic": ["pydantic"],
+    },
 )
@@ -0,0 +1,92 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Differential test of the stdlib validation backend against the pydantic v2
+backend, for the annotations the stdlib backend handles itself.
+"""
+
+import os
+import pathlib
+from typing import List, Literal, Optional
+
+import pytest
+
+pydantic = pytest.importorskip("pydantic")
+if not pydantic.VERSION.startswith("2."):
+    pytest.skip("requires pydantic v2", allow_module_level=True)
+
+from ticli import types
+from ticli.backends import stdlib, pydantic_v2
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_missing = os.path.join(_here, "no-such-file")
+
+_numbers = [
+    0, 1, 2, -7, 2**63 - 1, -2**63, 2**63, 2**70, True, False, 3.0, 3.5,
+    -0.0, 9.2e18, 2.0**63, -2.0**63, 1e20, float("inf"), float("nan"),
+]
+_number_strings = [
+    "12", " 12 ", "\t7\n", "+5", "-0", "0012", "1_000", "1__0", "_1", "1_",
+    "+-1", "12.0", "12.00", "-12.000", "1_2.0", "12.0_0", "12.", "12.5", ".5",
+    "1e3", "1.0e0", "1E3", "0x10", "inf", "-Infinity", "nan", "nan ", "",
+    " ", "abc", "١٢", "1.5f", "9" * 5000,
+]
+_bool_strings = [
+    "true", "TRUE", "True", "yes", "On", "t", "F", "y", "n", "off", "0", "1",
+    "2", "  true ", "true\n", "1 ", "", "maybe",
+]
+_other = [
+    None, b"12", b" 1 ", b"1.5", b"yes", b"\xff", b"", bytearray(b"3"),
+    bytearray(b"no"), bytearray(b"\xff"), [1], (), {"a": 1},
+    pathlib.Path("x"),
+]
+_scalars = _numbers + _number_strings + _bool_strings + _other
+
+_cases = [
+    (int, _scalars),
+    (float, _scalars),
+    (bool, _scalars),
+    (str, _scalars),
+    (pathlib.Path, ["x", "a/b", pathlib.Path("y"), 3, None, b"x"]),
+    (types.FilePath, [__file__, _here, _missing, 3]),
+    (types.DirectoryPath, [__file__, _here, _missing, 3]),
+    (Literal["a", "b"], ["a", "b", "c", None, 1]),
+    (Literal[1, 2], [1, 2, 3, "1", True, 1.0]),
+    (Optional[int], [None, 3, "4", "x", 4.5]),
+    (List[int], [[], [1, "2"], ["x", 3.5, None], (1, 2), {1, 2}, "12", None,
+                 [[1]]]),
+    (List[str], [["a", b"b"], [1], "ab"]),
+    (Optional[List[bool]], [None, ["yes", 0], ["maybe"]]),
+]
+
+# Return a function taking one argument with the given annotation and
+# returning it
+def _identity(annotation):
+    def f(x):
+        return x
+    f.__annotations__ = {"x": annotation}
+    return f
+
+# Return the outcome of validating a value with a backend, as comparable
+# (result) or (error type, location, message) data
+def _outcome(backend, annotation, value):
+    validated = backend.compile_arguments_validator(_identity(annotation))
+    try:
+        result = validated(value)
+    except backend.ValidationError as exc:
+        return "error", [(e["type"], tuple(e["loc"]), e["msg"])
+                         for e in exc.errors()]
+    return "ok", type(result), repr(result)
+
+@pytest.mark.parametrize(
+    "annotation, value",
+    [(a, v) for a, values in _cases for v in values],
+    ids=lambda x: repr(x)[:40])
+def test_stdlib_matches_pydantic_v2(annotation, value):
+    assert stdlib._compile(annotation) is not None
+    expected = _outcome(pydantic_v2, annotation, value)
+    assert _outcome(stdlib, annotation, value) == expected
@@ -0,0 +1,70 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Tests for the memoize result cache.
+"""
+
+from ticli import command, option, memoize
+from ticli import cache
+
+def _groups(directory):
+    @memoize(directory=directory)
+    @command
+    class Farewell:
+        def __post_init__(self, config):
+            self._config = config
+
+        def __post_call__(self):
+            if self._config.verbose:
+                print("getting ready to bid you farewell")
+            print("Goodbye.")
+
+    @option.group
+    class Top:
+        verbose: bool = False
+
+        def __post_init__(self):
+            self.farewell = Farewell(self)
+
+    return Farewell, Top
+
+def test_parent_group_options_in_key(tmp_path, capsys):
+    Farewell, Top = _groups(str(tmp_path))
+    Top().farewell()
+    assert capsys.readouterr().out == "Goodbye.\n"
+    Top(verbose=True).farewell()
+    assert capsys.readouterr().out == \
+        "getting ready to bid you farewell\nGoodbye.\n"
+    # Equal parent groups share an entry, whatever their address
+    key = cache._key(Top(verbose=True).farewell, (), {}, False)
+    assert key == cache._key(Top(verbose=True).farewell, (), {}, False)
+
+def test_default_repr_not_cached(tmp_path, capsys):
+    @memoize(directory=str(tmp_path))
+    @command
+    class Show:
+        def __post_call__(self, value):
+            print("computing")
+
+    Show()(object())
+    Show()(object())
+    assert capsys.readouterr().out == "computing\ncomputing\n"
+    assert not list(tmp_path.iterdir())
+
+def test_unwritable_cache_ignored(tmp_path, capsys):
+    directory = tmp_path / "ticli"
+    directory.write_text("")
+
+    @memoize(directory=str(directory))
+    @command
+    class Answer:
+        def __post_call__(self):
+            print("computing")
+            return 42
+
+    assert Answer()() == 42
+    assert capsys.readouterr().out == "computing\n"
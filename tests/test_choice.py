@@ -0,0 +1,43 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Tests for Choice options with choices that look like numbers.
+"""
+
+import pytest
+
+from ticli import option, dispatch
+from ticli.types import Choice
+
+Version = Choice(["1.10", "1.9", "1_000", "0x10", "True", "latest"],
+                 name="version")
+
+@option.group
+class Tool:
+    def pick(self, version: Version):
+        return version
+
+def _fallback(component, argv):
+    raise AssertionError(f"fell back to fire for {argv}")
+
+@pytest.mark.parametrize("word", ["1.10", "1.9", "1_000", "0x10", "True",
+                                  "latest"])
+def test_dispatch_keeps_word(word, capsys):
+    dispatch.dispatch(Tool(), ["pick", word], _fallback)
+    assert capsys.readouterr().out == f"{word}\n"
+    dispatch.dispatch(Tool(), ["pick", f"--version={word}"], _fallback)
+    assert capsys.readouterr().out == f"{word}\n"
+
+# Values parsed from the command line by fire
+@pytest.mark.parametrize("word", ["1.10", "1_000", "0x10", "True"])
+def test_match_parsed_value(word):
+    assert Version.match(dispatch.parse_value(word)) == word
+
+def test_match_ambiguous_parsed_value():
+    choice = Choice(["1.10", "1.100"])
+    assert choice.match(dispatch.parse_value("1.10")) is None
+    assert choice.match("1.10") == "1.10"
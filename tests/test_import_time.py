@@ -0,0 +1,48 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Import-time budget for the ticli package.
+"""
+
+import os
+import sys
+import subprocess
+
+_top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Maximum cumulative time for "import ticli", in microseconds, as reported
+# by python -X importtime
+budget_us = 50000
+
+# Dependencies that must only be imported once they are needed
+deferred_modules = ["pydantic", "makefun", "decopatch", "fire"]
+
+def _run(code, *options):
+    env = dict(os.environ, PYTHONPATH=_top)
+    return subprocess.run([sys.executable, *options, "-c", code], env=env,
+                          capture_output=True, text=True, check=True)
+
+# Return the cumulative import time of a top-level module, in microseconds
+def _import_time(stderr, module):
+    for line in stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"no import time reported for {module}")
+
+def test_import_time_within_budget():
+    # Take the best of a few runs to keep system noise out of the result
+    times = [_import_time(_run("import ticli", "-X", "importtime").stderr,
+                          "ticli") for _ in range(3)]
+    assert min(times) <= budget_us, \
+        f"import ticli took {min(times)} us (budget {budget_us} us)"
+
+def test_heavy_dependencies_deferred():
+    code = "import sys, ticli; print(' '.join(sys.modules))"
+    loaded = set(_run(code).stdout.split())
+    imported = [m for m in deferred_modules if m in loaded]
+    assert not imported, f"import ticli imported {', '.join(imported)}"
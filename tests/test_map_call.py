@@ -0,0 +1,29 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Tests for calling a group once per row of arguments.
+"""
+
+import pytest
+
+from ticli import command, option
+
+@command
+class Scale:
+    factor: float = 2.0
+
+    def __post_call__(self, height: float, units: str = "feet"):
+        return height * self.factor
+
+def test_columns_converted():
+    rows = {"height": ["1", 2], "units": ["feet", "inches"]}
+    assert list(option.map_call(Scale(), rows)) == [2.0, 4.0]
+
+def test_columns_of_different_lengths():
+    rows = {"height": [1, 2, 3], "units": ["feet", "inches"]}
+    with pytest.raises(ValueError, match="'units' has 2 values"):
+        list(option.map_call(Scale(), rows))
@@ -0,0 +1,27 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Tests for looking up the kinds of many paths at once.
+"""
+
+import os
+
+from ticli import types
+
+def test_unlistable_directory(tmp_path, monkeypatch):
+    names = [f"f{i}" for i in range(types.scandir_threshold)]
+    for name in names:
+        (tmp_path / name).write_text("")
+    (tmp_path / "d").mkdir()
+    paths = [tmp_path / n for n in names + ["d", "missing"]]
+
+    # A directory with execute but no read permission
+    def scandir(path):
+        raise PermissionError(13, "Permission denied", path)
+    monkeypatch.setattr(os, "scandir", scandir)
+    assert types.path_kinds(paths) == \
+        ["file"] * len(names) + ["dir", None]
@@ -0,0 +1,35 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Tests for streaming output to a pipe.
+"""
+
+import os
+import time
+
+import pytest
+
+from ticli import stream
+
+def test_closed_pipe_stops_slow_producer():
+    read_fd, write_fd = os.pipe()
+    os.close(read_fd)
+    produced = []
+    def slow(n):
+        for i in range(n):
+            produced.append(i)
+            time.sleep(stream.flush_interval / 2)
+            yield i
+    start = time.monotonic()
+    with open(write_fd, "w") as file:
+        with pytest.raises(SystemExit) as exc:
+            stream.write_stream(slow(40), file=file)
+    assert exc.value.code == 141
+    # The pipe is found closed by the first write in the background, well
+    # before the producer runs out of items
+    assert len(produced) < 10
+    assert time.monotonic() - start < 40 * stream.flush_interval / 4
@@ -4,11 +4,56 @@
 
 # Author: Jeff Webb <jeff.webb@codecraftsmen.org>
 
-from .option import command, enable_debug
-from .validation import (
-    ValidationError,
-    print_validation_error,
-    validate_arguments,
-    check_type,
-)
-from .fire import Fire
+import importlib
+
+# Public attributes and the submodules that provide them.  These are imported
+# on first access so that "import ticli" does not pull in pydantic, fire,
+# makefun, or decopatch until they are actually needed.
+_lazy_attrs = {
+    "command": "option",
+    "prepare_call": "option",
+    "map_call": "option",
+    "memoize": "cache",
+    "enable_debug": "option",
+    "disable_debug": "option",
+    "ValidationError": "validation",
+    "Invalid_Arguments": "validation",
+    "print_validation_error": "validation",
+    "validate_arguments": "validation",
+    "check_type": "validation",
+    "validator_cache_info": "validation",
+    "Fire": "fire",
+    "serve": "server",
+    "help_from_manifest": "manifest",
+}
+
+_submodules = [
+    "aio",
+    "batch",
+    "cache",
+    "completion",
+    "dispatch",
+    "fire",
+    "manifest",
+    "option",
+    "parallel",
+    "server",
+    "stream",
+    "trace",
+    "types",
+    "validation",
+]
+
+def __getattr__(name):
+    if name in _lazy_attrs:
+        module = importlib.import_module(f".{_lazy_attrs[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _submodules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_attrs) | set(_submodules))
@@ -0,0 +1,98 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Support for asynchronous (async def) commands and hooks.
+
+Awaitable results (resolved by the native dispatcher, or by the serialize
+hook passed to fire) and asynchronous __post_init__ methods (finished when
+the group is constructed outside of a running event loop, and otherwise
+awaited later through initialized()) run on one event loop, which is kept
+for the rest of the invocation, so that chained steps run in order and can
+share loop-bound resources.  ticli.Fire closes the loop when the invocation
+is done.
+"""
+
+import inspect
+
+_loop = None
+
+# Return the event loop of the current invocation, creating it if necessary
+def event_loop():
+    import asyncio
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+# Return True if called from code running in an event loop
+def in_running_loop():
+    import asyncio
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+# Return a value, running it to completion first if it is awaitable
+def resolve(value):
+    if not inspect.isawaitable(value):
+        return value
+    return event_loop().run_until_complete(value)
+
+# Iterate over an asynchronous iterator from synchronous code
+def iterate(aiterable):
+    loop = event_loop()
+    it = aiterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(it.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        if hasattr(it, "aclose"):
+            loop.run_until_complete(it.aclose())
+
+# Mark a group instance as seen and remove and return its pending
+# asynchronous __post_init__ result
+def _take_pending(g, seen):
+    seen.add(id(g))
+    return getattr(g, "__dict__", {}).pop("_pending_init", None)
+
+# Finish the pending asynchronous __post_init__ of a group instance and its
+# subgroups, if any
+def ready(g, _seen=None):
+    if _seen is None:
+        _seen = set()
+    pending = _take_pending(g, _seen)
+    if pending is not None:
+        resolve(pending)
+    from .option import subgroups_of
+    for _, subgroup in subgroups_of(g, _seen):
+        ready(subgroup, _seen)
+    return g
+
+# Await the pending asynchronous __post_init__ of a group instance and its
+# subgroups, if any, from code already running in an event loop
+async def initialized(g, _seen=None):
+    if _seen is None:
+        _seen = set()
+    pending = _take_pending(g, _seen)
+    if pending is not None:
+        await pending
+    from .option import subgroups_of
+    for _, subgroup in subgroups_of(g, _seen):
+        await initialized(subgroup, _seen)
+    return g
+
+# Close the event loop of the current invocation, if one was created
+def close():
+    global _loop
+    if _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(_loop.shutdown_asyncgens())
+        _loop.close()
+    _loop = None
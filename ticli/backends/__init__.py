@@ -0,0 +1,34 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Validation backends.
+
+Each backend module provides:
+
+  ValidationError: exception raised for invalid values
+  compile_arguments_validator(member): returns a callable that validates
+    the arguments of a call to member and then calls it
+  compile_type_validator(arg_name, type_annotation): returns a callable
+    that validates a single value for the named argument
+  compile_arguments_model(model_name, arg_types): returns a callable that
+    validates a dictionary holding any subset of the named arguments
+
+Errors must be reported with the argument name as the first element of the
+error location, as expected by ticli.validation.print_validation_error.
+
+The stdlib backend is used by default and hands annotations it does not
+support to the pydantic backend matching the installed pydantic version.
+"""
+
+# Return the pydantic backend for the installed pydantic version
+def pydantic_backend():
+    import pydantic
+    if pydantic.VERSION.startswith("1."):
+        from . import pydantic_v1 as b
+    else:
+        from . import pydantic_v2 as b
+    return b
@@ -0,0 +1,35 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Validation backend for pydantic v1.
+"""
+
+import pydantic
+
+# Pull this symbol into the module namespace for use by others
+from pydantic import ValidationError
+
+def compile_arguments_validator(member):
+    return pydantic.validate_arguments(member)
+
+def compile_type_validator(arg_name, type_annotation):
+    default_value = None # does not matter
+    M = pydantic.create_model(
+        "Temp_Model",
+        **{arg_name: (type_annotation, default_value)})
+    def validate(value):
+        return getattr(M(**{arg_name: value}), arg_name)
+    return validate
+
+def compile_arguments_model(model_name, arg_types):
+    default_value = None # does not matter
+    M = pydantic.create_model(
+        model_name,
+        **{n: (t, default_value) for n, t in arg_types.items()})
+    def validate(values):
+        M(**values)
+    return validate
@@ -0,0 +1,77 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Validation backend for pydantic v2.
+
+Validators are compiled once into pydantic-core schemas using TypeAdapter
+and validate_call.
+"""
+
+import inspect
+from pydantic import TypeAdapter, validate_call
+from typing_extensions import TypedDict
+
+# Pull this symbol into the module namespace for use by others
+from pydantic import ValidationError
+
+# Rebuild a ValidationError with the error locations passed through loc_map,
+# so that errors are reported by argument name rather than by position
+def _relocate(exc, loc_map):
+    line_errors = []
+    for error in exc.errors():
+        details = {
+            "type": error["type"],
+            "loc": loc_map(tuple(error["loc"])),
+            "input": error["input"],
+        }
+        if "ctx" in error:
+            details["ctx"] = error["ctx"]
+        line_errors.append(details)
+    try:
+        return ValidationError.from_exception_data(exc.title, line_errors)
+    except KeyError:
+        # Error types raised from Python code (such as those of the path
+        # types) are not known to pydantic-core, so rebuild them as custom
+        # errors with the already formatted messages
+        from pydantic_core import PydanticCustomError
+        for details, error in zip(line_errors, exc.errors()):
+            details["type"] = PydanticCustomError(error["type"], error["msg"])
+            details.pop("ctx", None)
+        return ValidationError.from_exception_data(exc.title, line_errors)
+
+def compile_arguments_validator(member):
+    g = validate_call(member)
+    positional_names = [
+        p.name for p in inspect.signature(member).parameters.values()
+        if p.kind in [ inspect.Parameter.POSITIONAL_ONLY,
+                       inspect.Parameter.POSITIONAL_OR_KEYWORD ] ]
+    def loc_map(loc):
+        if loc and isinstance(loc[0], int) and \
+           loc[0] < len(positional_names):
+            return (positional_names[loc[0]],) + loc[1:]
+        return loc
+    def validated(*args, **kw):
+        try:
+            return g(*args, **kw)
+        except ValidationError as exc:
+            raise _relocate(exc, loc_map) from None
+    return validated
+
+def compile_type_validator(arg_name, type_annotation):
+    adapter = TypeAdapter(type_annotation)
+    def validate(value):
+        try:
+            return adapter.validate_python(value)
+        except ValidationError as exc:
+            raise _relocate(exc, lambda loc: (arg_name,) + loc) from None
+    return validate
+
+def compile_arguments_model(model_name, arg_types):
+    adapter = TypeAdapter(TypedDict(model_name, arg_types, total=False))
+    def validate(values):
+        adapter.validate_python(values)
+    return validate
@@ -0,0 +1,420 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Validation backend implemented with the standard library.
+
+Handles the annotations most options use (int, float, bool, str, Path,
+Literal, Optional, List, and the path and choice types in ticli.types) with
+checks compiled once per annotation, coercing values supplied as
+command-line strings the way pydantic does in lax mode.  Functions and types using any
+other annotation are validated by the pydantic backend instead, with its
+errors converted to the ValidationError defined here.
+"""
+
+import re
+import math
+import typing
+import inspect
+import pathlib
+from . import pydantic_backend
+from .. import types
+
+# Validation failure with pydantic-compatible error information
+class ValidationError(ValueError):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self._errors = errors
+
+    def errors(self):
+        return self._errors
+
+    def __str__(self):
+        lines = [f"{len(self._errors)} validation error(s)"]
+        for error in self._errors:
+            loc = ".".join(str(e) for e in error["loc"])
+            lines.append(f"{loc}\n  {error['msg']} [type={error['type']}]")
+        return "\n".join(lines)
+
+# Raised by compiled converters, holding (loc, type, msg, input) tuples with
+# locations relative to the converted value
+class _Invalid(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+
+    def located(self, loc):
+        return [{"type": t, "loc": loc + l, "msg": m, "input": i}
+                for l, t, m, i in self.errors]
+
+_messages = {
+    "int_type": "Input should be a valid integer",
+    "int_parsing":
+        "Input should be a valid integer, unable to parse string as an "
+        "integer",
+    "int_from_float":
+        "Input should be a valid integer, got a number with a fractional part",
+    "finite_number": "Input should be a finite number",
+    "int_parsing_size":
+        "Unable to parse input string as an integer, exceeded maximum size",
+    "float_type": "Input should be a valid number",
+    "float_parsing":
+        "Input should be a valid number, unable to parse string as a number",
+    "bool_type": "Input should be a valid boolean",
+    "bool_parsing":
+        "Input should be a valid boolean, unable to interpret input",
+    "string_type": "Input should be a valid string",
+    "string_unicode":
+        "Input should be a valid string, unable to parse raw data as a "
+        "unicode string",
+    "list_type": "Input should be a valid list",
+    "path_type": "Input is not a valid path for <class 'pathlib.Path'>",
+    "path_not_file": "Path does not point to a file",
+    "path_not_directory": "Path does not point to a directory",
+    "missing_argument": "Missing required argument",
+    "unexpected_keyword_argument": "Unexpected keyword argument",
+    "unexpected_positional_argument": "Unexpected positional argument",
+    "multiple_argument_values": "Got multiple values for argument",
+}
+
+def _invalid(error_type, value):
+    return _Invalid([((), error_type, _messages[error_type], value)])
+
+def _any(value):
+    return value
+
+# Decode bytes input the way pydantic does, returning None if it is not
+# valid UTF-8
+def _decode(value):
+    try:
+        return value.decode()
+    except UnicodeDecodeError:
+        return None
+
+# Integer strings accepted by pydantic: ASCII digits with single underscores
+# between them, and optionally a fractional part of zeros
+_int_string = re.compile(r"[+-]?[0-9]+(?:_[0-9]+)*(?:\.0+)?")
+
+# Bound of the 64-bit integers pydantic converts floats to
+_int64_bound = 1 << 63
+
+def _int(value):
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise _invalid("finite_number", value)
+        if not -_int64_bound < value < _int64_bound:
+            raise _invalid("int_parsing_size", value)
+        if value.is_integer():
+            return int(value)
+        raise _invalid("int_from_float", value)
+    if isinstance(value, bytes):
+        s = _decode(value)
+    elif isinstance(value, str):
+        s = value
+    else:
+        raise _invalid("int_type", value)
+    s = s and s.strip()
+    if not s or not _int_string.fullmatch(s):
+        raise _invalid("int_parsing", value)
+    try:
+        return int(s.partition(".")[0])
+    except ValueError:
+        # More digits than Python converts
+        raise _invalid("int_parsing_size", value) from None
+
+def _float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, bytes):
+        s = _decode(value)
+    elif isinstance(value, str):
+        s = value
+    else:
+        raise _invalid("float_type", value)
+    # Python also accepts digits of other scripts, which pydantic does not
+    if s is None or not s.isascii():
+        raise _invalid("float_parsing", value)
+    try:
+        return float(s)
+    except ValueError:
+        raise _invalid("float_parsing", value) from None
+
+_true_strings = {"1", "on", "t", "true", "y", "yes"}
+_false_strings = {"0", "off", "f", "false", "n", "no"}
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        if value == 1:
+            return True
+        if value == 0:
+            return False
+        # Other numbers are reported as pydantic does
+        if isinstance(value, int):
+            in_range = -_int64_bound <= value < _int64_bound
+        else:
+            in_range = value.is_integer() and \
+                -_int64_bound < value < _int64_bound
+        raise _invalid("bool_parsing" if in_range else "bool_type", value)
+    if isinstance(value, bytes):
+        s = _decode(value)
+    elif isinstance(value, str):
+        s = value
+    else:
+        raise _invalid("bool_type", value)
+    # Unlike the numeric types, surrounding whitespace is not accepted
+    s = s and s.lower()
+    if s in _true_strings:
+        return True
+    if s in _false_strings:
+        return False
+    raise _invalid("bool_parsing", value)
+
+def _str(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        s = _decode(value)
+        if s is None:
+            raise _invalid("string_unicode", value)
+        return s
+    raise _invalid("string_type", value)
+
+def _path(value):
+    if isinstance(value, (str, pathlib.PurePath)):
+        return pathlib.Path(value)
+    raise _invalid("path_type", value)
+
+def _file_path(value):
+    path = _path(value)
+    if not path.is_file():
+        raise _invalid("path_not_file", value)
+    return path
+
+def _directory_path(value):
+    path = _path(value)
+    if not path.is_dir():
+        raise _invalid("path_not_directory", value)
+    return path
+
+def _path_list(annotation):
+    def convert(value):
+        if not isinstance(value, (list, tuple)):
+            raise _invalid("list_type", value)
+        paths, errors = annotation.check(value)
+        if errors:
+            raise _Invalid([((i,), t, m, value[i]) for i, t, m in errors])
+        return paths
+    return convert
+
+_simple_converters = {
+    int: _int,
+    float: _float,
+    bool: _bool,
+    str: _str,
+    pathlib.Path: _path,
+    types.FilePath: _file_path,
+    types.DirectoryPath: _directory_path,
+    types.FilePathList: _path_list(types.FilePathList),
+    types.DirectoryPathList: _path_list(types.DirectoryPathList),
+    typing.Any: _any,
+    object: _any,
+    inspect.Parameter.empty: _any,
+}
+
+def _literal(values):
+    try:
+        allowed = {v: v for v in values}
+    except TypeError:
+        return None
+    reprs = [repr(v) for v in values]
+    expected = reprs[0] if len(reprs) == 1 else \
+        ", ".join(reprs[:-1]) + f" or {reprs[-1]}"
+    message = f"Input should be {expected}"
+    def convert(value):
+        try:
+            return allowed[value]
+        except (KeyError, TypeError):
+            raise _Invalid([((), "literal_error", message, value)]) from None
+    return convert
+
+def _choice(choice):
+    def convert(value):
+        result = choice.match(value)
+        if result is None:
+            raise _Invalid([((), "choice_error", choice.error_message(value),
+                             value)])
+        return result
+    return convert
+
+def _large_file(large_file):
+    def convert(value):
+        problem = large_file.problem(value)
+        if problem is not None:
+            raise _Invalid([((),) + problem + (value,)])
+        if isinstance(value, types.Mapped_File):
+            return value
+        return types.Mapped_File(value)
+    return convert
+
+def _optional(convert):
+    def optional(value):
+        if value is None:
+            return None
+        return convert(value)
+    return optional
+
+def _list(convert):
+    def convert_list(value):
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            raise _invalid("list_type", value)
+        result = []
+        errors = []
+        for i, item in enumerate(value):
+            try:
+                result.append(convert(item))
+            except _Invalid as exc:
+                errors.extend(((i,) + l, t, m, v) for l, t, m, v in exc.errors)
+        if errors:
+            raise _Invalid(errors)
+        return result
+    return convert_list
+
+# Return a converter for an annotation, or None if it is not supported
+def _compile(annotation):
+    try:
+        convert = _simple_converters.get(annotation)
+    except TypeError:
+        # Unhashable annotation
+        return None
+    if convert is not None:
+        return convert
+    if isinstance(annotation, types.Choice):
+        return _choice(annotation)
+    if isinstance(annotation, types.LargeFile):
+        return _large_file(annotation)
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Literal:
+        return _literal(args)
+    if origin is typing.Union:
+        others = [a for a in args if a is not type(None)]
+        if len(others) == 1 and len(args) == 2:
+            convert = _compile(others[0])
+            return convert and _optional(convert)
+        return None
+    if annotation is list or origin is list:
+        convert = _compile(args[0]) if args else _any
+        return convert and _list(convert)
+    return None
+
+# Wrap a pydantic backend validator so that it raises ValidationError from
+# this module
+def _with_pydantic(f):
+    pydantic_error = pydantic_backend().ValidationError
+    def validated(*args, **kw):
+        try:
+            return f(*args, **kw)
+        except pydantic_error as exc:
+            raise ValidationError(exc.errors()) from None
+    return validated
+
+_var_kinds = [ inspect.Parameter.VAR_POSITIONAL,
+               inspect.Parameter.VAR_KEYWORD ]
+
+# Describe why the arguments of a call cannot be bound to a signature
+def _binding_errors(sig, args, kw):
+    params = list(sig.parameters.values())
+    positional = [p for p in params
+                  if p.kind in [ inspect.Parameter.POSITIONAL_ONLY,
+                                 inspect.Parameter.POSITIONAL_OR_KEYWORD ]]
+    kinds = [p.kind for p in params]
+    errors = []
+    given = set()
+    for i, value in enumerate(args):
+        if i < len(positional):
+            given.add(positional[i].name)
+        elif inspect.Parameter.VAR_POSITIONAL not in kinds:
+            errors.append(((i,), "unexpected_positional_argument", value))
+    for name, value in kw.items():
+        p = sig.parameters.get(name)
+        if p is None or p.kind in _var_kinds or \
+           p.kind == inspect.Parameter.POSITIONAL_ONLY:
+            if inspect.Parameter.VAR_KEYWORD not in kinds:
+                errors.append(((name,), "unexpected_keyword_argument", value))
+        elif name in given:
+            errors.append(((name,), "multiple_argument_values", value))
+        else:
+            given.add(name)
+    for p in params:
+        if p.default is inspect.Parameter.empty and \
+           p.kind not in _var_kinds and p.name not in given:
+            errors.append(((p.name,), "missing_argument", kw))
+    return [{"type": t, "loc": loc, "msg": _messages[t], "input": value}
+            for loc, t, value in errors]
+
+def compile_arguments_validator(member):
+    sig = inspect.signature(member)
+    converters = {}
+    for p in sig.parameters.values():
+        convert = _compile(p.annotation)
+        if convert is None or (p.kind in _var_kinds and convert is not _any):
+            return _with_pydantic(
+                pydantic_backend().compile_arguments_validator(member))
+        if convert is not _any:
+            converters[p.name] = convert
+    def validated(*args, **kw):
+        try:
+            bound = sig.bind(*args, **kw)
+        except TypeError:
+            errors = _binding_errors(sig, args, kw)
+            if not errors:
+                raise
+            raise ValidationError(errors) from None
+        arguments = bound.arguments
+        errors = []
+        for name, convert in converters.items():
+            if name in arguments:
+                try:
+                    arguments[name] = convert(arguments[name])
+                except _Invalid as exc:
+                    errors.extend(exc.located((name,)))
+        if errors:
+            raise ValidationError(errors)
+        return member(*bound.args, **bound.kwargs)
+    return validated
+
+def compile_type_validator(arg_name, type_annotation):
+    convert = _compile(type_annotation)
+    if convert is None:
+        return _with_pydantic(pydantic_backend().compile_type_validator(
+            arg_name, type_annotation))
+    loc = (arg_name,)
+    def validate(value):
+        try:
+            return convert(value)
+        except _Invalid as exc:
+            raise ValidationError(exc.located(loc)) from None
+    return validate
+
+def compile_arguments_model(model_name, arg_types):
+    validators = {n: compile_type_validator(n, t)
+                  for n, t in arg_types.items()}
+    def validate(values):
+        errors = []
+        for name, value in values.items():
+            validate_one = validators.get(name)
+            if validate_one is None:
+                continue
+            try:
+                validate_one(value)
+            except ValidationError as exc:
+                errors.extend(exc.errors())
+        if errors:
+            raise ValidationError(errors)
+    return validate
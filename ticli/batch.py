@@ -0,0 +1,71 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Batch mode for running many command lines in one process.
+"""
+
+import sys
+import shlex
+
+# Restore the option defaults of a group and of any groups reachable through
+# its attributes (such as subcommand groups created in __post_init__)
+def restore_all_defaults(g, _seen=None):
+    if _seen is None:
+        _seen = set()
+    if id(g) in _seen:
+        return
+    _seen.add(id(g))
+    g._restore_defaults()
+    from .option import subgroups_of
+    for _, subgroup in subgroups_of(g, _seen):
+        restore_all_defaults(subgroup, _seen)
+
+# Yield (line_number, argv) pairs for the non-blank, non-comment lines of a
+# batch source ("-" for stdin, a file name, or an iterable of lines)
+def read_batch(source):
+    if source == "-":
+        lines = sys.stdin
+    elif isinstance(source, str):
+        with open(source) as f:
+            lines = f.readlines()
+    else:
+        lines = source
+    for line_number, line in enumerate(lines, 1):
+        argv = shlex.split(line, comments=True)
+        if argv:
+            yield line_number, argv
+
+# Run each command line of a batch source against the component, reporting
+# failures without stopping.  Group instances have their option defaults
+# restored before each line; classes are constructed anew for each line.
+# Returns a list of (line_number, exit_code) pairs.
+def run_batch(component, source, run, name=None):
+    if name is None:
+        name = sys.argv[0]
+    is_instance = getattr(component, "_is_option_group", False) and \
+        not isinstance(component, type)
+    results = []
+    for line_number, argv in read_batch(source):
+        if is_instance:
+            restore_all_defaults(component)
+        exit_code = 0
+        try:
+            run(component, argv)
+        except SystemExit as exc:
+            exit_code = exc.code if isinstance(exc.code, int) else 1
+            if exc.code is None:
+                exit_code = 0
+        except Exception as exc:
+            print(f"{name}: line {line_number}: {type(exc).__name__}: {exc}",
+                  file=sys.stderr)
+            exit_code = 1
+        if exit_code:
+            print(f"{name}: line {line_number}: exit code {exit_code}",
+                  file=sys.stderr)
+        sys.stdout.flush()
+        results.append((line_number, exit_code))
+    return results
@@ -0,0 +1,262 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Disk-backed result cache for commands that are pure functions of their
+options, arguments, and input files.
+
+Decorate a command class (above @command) to cache its __post_call__:
+
+    @memoize
+    @command
+    class Summarize:
+        ...
+
+The cache key covers the class, the option values, the __post_init__ and
+__post_call__ arguments (with defaults filled in, and group instances such
+as a parent group represented by their class and option values; arguments
+with no stable representation disable caching), the state of any
+FilePath, DirectoryPath, FilePathList, or DirectoryPathList values
+(modification time and size, or a hash of the file contents if content_hash
+is true), and the state of the source file defining the class.  Any other
+instance state that __post_call__ depends on must come from these.  The result and the output
+printed by __post_call__ are stored in the cache directory, so a repeated
+invocation with unchanged inputs prints the same output and returns the same
+result without running the command.  The least recently used entries are
+removed once the cache grows beyond max_size bytes.
+"""
+
+import os
+import sys
+import typing
+import hashlib
+import inspect
+from decopatch import class_decorator, DECORATED
+from . import types
+
+# Default maximum total size of the cache, in bytes
+default_max_size = 256 << 20
+
+def default_directory():
+    base = os.environ.get("XDG_CACHE_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ticli")
+
+# Marker stored for results that are the command instance itself
+class _Self_Result:
+    pass
+
+# Writer that copies output to a stream while recording it
+class _Tee:
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts = []
+
+    def write(self, s):
+        self.parts.append(s)
+        return self.stream.write(s)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+# Return the paths held by a value with the given type annotation
+def _paths(annotation, value):
+    if annotation in [types.FilePath, types.DirectoryPath]:
+        return [value]
+    if annotation in [types.FilePathList, types.DirectoryPathList] and \
+       isinstance(value, (list, tuple)):
+        return list(value)
+    args = typing.get_args(annotation)
+    if typing.get_origin(annotation) is typing.Union:
+        return [p for a in args for p in _paths(a, value)]
+    if typing.get_origin(annotation) is list and args and \
+       isinstance(value, (list, tuple)):
+        return [p for v in value for p in _paths(args[0], v)]
+    return []
+
+def _file_state(path, content_hash):
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    if content_hash and os.path.isfile(path):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+    return (st.st_mtime_ns, st.st_size)
+
+# Return the arguments of a call bound to the parameters of a signature
+# (leaving out self), with defaults filled in, so that equivalent calls get
+# the same key
+def _bound_arguments(g, sig, args, kw):
+    bound = sig.bind(g, *args, **kw)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.pop(next(iter(sig.parameters)))
+    return arguments
+
+def _annotations(sig):
+    return {p.name: p.annotation for p in sig.parameters.values()}
+
+# Return a representation of a value for a cache key that does not depend on
+# object addresses, so that it also matches in other processes.  Group
+# instances (such as the parent group passed to a subgroup) are represented
+# by their class and option values.  Raise TypeError for values with only the
+# default object repr, which cannot be keyed.
+def _key_repr(value):
+    cls = type(value)
+    if getattr(value, "_is_option_group", False) and \
+       not isinstance(value, type):
+        return f"<{cls.__module__}.{cls.__qualname__} " \
+            f"{_key_repr(dict(value._option_data))}>"
+    if isinstance(value, dict):
+        items = sorted((_key_repr(k), _key_repr(v)) for k, v in value.items())
+        return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_key_repr(v) for v in value]
+        if isinstance(value, (set, frozenset)):
+            items.sort()
+        return f"{cls.__qualname__}({', '.join(items)})"
+    if cls.__repr__ is object.__repr__:
+        raise TypeError(f"{cls.__qualname__} values cannot be cached")
+    return repr(value)
+
+# Compute the cache key for a call
+def _key(g, args, kw, content_hash):
+    cls = type(g)
+    init_args, init_kw = getattr(g, "_post_init_arguments", ((), {}))
+    init_arguments = _bound_arguments(
+        g, cls._post_init_sig, init_args, init_kw)
+    call_arguments = _bound_arguments(g, cls._post_call_sig, args, kw)
+    files = {}
+    for values, annotations in [
+            (g._option_data, cls._option_types),
+            (init_arguments, _annotations(cls._post_init_sig)),
+            (call_arguments, _annotations(cls._post_call_sig))]:
+        for name, value in values.items():
+            for path in _paths(annotations.get(name), value):
+                files[str(path)] = _file_state(path, content_hash)
+    try:
+        source = inspect.getsourcefile(cls)
+    except TypeError:
+        source = None
+    parts = [
+        f"{cls.__module__}.{cls.__qualname__}",
+        _key_repr(dict(g._option_data)),
+        _key_repr(init_arguments),
+        _key_repr(call_arguments),
+        repr(sorted(files.items())),
+        repr((source, source and _file_state(source, False))),
+    ]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+def _load(path):
+    import pickle
+    try:
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ImportError, IndexError):
+        return None
+    # Mark the entry as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry
+
+def _store(directory, path, entry, max_size):
+    import pickle
+    try:
+        data = pickle.dumps(entry)
+    except Exception:
+        # Results that cannot be pickled are not cached
+        return
+    import threading
+    # The cache is best-effort: a failure to write it (a full disk, missing
+    # permissions, or a file in place of the directory) leaves the command
+    # result unaffected
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        evict(directory, max_size)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+# Remove the least recently used cache entries until the cache holds at most
+# max_size bytes
+def evict(directory, max_size):
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for e in it:
+            if e.name.endswith(".pickle"):
+                st = e.stat()
+                entries.append((st.st_mtime_ns, st.st_size, e.path))
+                total += st.st_size
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+# Remove all cache entries
+def clear_cache(directory=None):
+    if directory is None:
+        directory = default_directory()
+    if os.path.isdir(directory):
+        evict(directory, 0)
+
+@class_decorator
+def memoize(C=DECORATED, directory=None, max_size=default_max_size,
+            content_hash=False):
+    if not getattr(C, "_is_command", False):
+        raise TypeError(f"memoize requires a command class, not {C!r}")
+    post_call = C.__post_call__
+
+    def __post_call__(self, *args, **kw):
+        cache_dir = directory or default_directory()
+        try:
+            key = _key(self, args, kw, content_hash)
+        except TypeError:
+            # The arguments do not fit the signature, which the call
+            # reports, or have no stable key
+            return post_call(self, *args, **kw)
+        path = os.path.join(cache_dir, key + ".pickle")
+        entry = _load(path)
+        if entry is not None:
+            output, result = entry
+            sys.stdout.write(output)
+            return self if result is _Self_Result else result
+        tee = _Tee(sys.stdout)
+        sys.stdout = tee
+        try:
+            result = post_call(self, *args, **kw)
+        finally:
+            if sys.stdout is tee:
+                sys.stdout = tee.stream
+        if not inspect.isgenerator(result) and \
+           not inspect.isawaitable(result):
+            stored = _Self_Result if result is self else result
+            _store(cache_dir, path, ("".join(tee.parts), stored), max_size)
+        return result
+
+    __post_call__.__signature__ = inspect.signature(post_call)
+    __post_call__.__doc__ = post_call.__doc__
+    C.__post_call__ = __post_call__
+    return C
@@ -0,0 +1,155 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Static shell-completion script generation from option group metadata.
+
+The generated script contains every subcommand, flag, and enumerated value,
+so completing a command line does not need to start Python.
+"""
+
+import re
+import shlex
+import typing
+import inspect
+from .dispatch import parse_table_for, _Call_Entry
+
+# Completion information for one component (a group, a subgroup, or a
+# method) of the command line
+class _Node:
+    def __init__(self, entry):
+        self.commands = {}
+        self.flags = []
+        self.values = {}
+        self.takes_value = set()
+        self.positional = []
+        for name in sorted(entry.names):
+            flag = f"--{name}"
+            self.flags.append(flag)
+            choices = choices_for(entry.annotations[name])
+            if name in entry.bool_names:
+                self.flags.append(f"--no{name}")
+            else:
+                self.takes_value.add(flag)
+            if choices:
+                self.values[flag] = choices
+        for name in entry.positional_names:
+            if entry.accepts_positional_args:
+                self.positional.extend(
+                    choices_for(entry.annotations[name]) or [])
+
+# Return the enumerated values for a type annotation, if there are any
+def choices_for(annotation):
+    from .types import Choice
+    if isinstance(annotation, Choice):
+        return annotation.complete()
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        return [str(a) for a in typing.get_args(annotation)]
+    if origin is typing.Union:
+        choices = []
+        for a in typing.get_args(annotation):
+            choices.extend(choices_for(a) or [])
+        return choices
+    return None
+
+def _group_node(g, entry, seen):
+    cls = g if inspect.isclass(g) else type(g)
+    table = parse_table_for(cls)
+    node = _Node(entry)
+    for name, method_entry in table.methods.items():
+        node.commands[name] = _Node(method_entry)
+    from .option import (
+        instantiate_lazy_subgroups, subgroups_of, try_instantiate)
+    instance = try_instantiate(g) if inspect.isclass(g) else g
+    if instance is not None:
+        instantiate_lazy_subgroups(instance)
+        seen.add(id(instance))
+        for name, value in subgroups_of(instance, seen, False):
+            node.commands[name] = _group_node(
+                value, parse_table_for(type(value)).call, seen)
+    return node
+
+# Build the completion tree for a component
+def completion_tree(component):
+    if inspect.isclass(component):
+        return _group_node(
+            component, parse_table_for(component).init, set())
+    if getattr(component, "_is_option_group", False):
+        return _group_node(
+            component, parse_table_for(type(component)).call, set())
+    return _Node(_Call_Entry(
+        inspect.signature(component), accepts_positional_args=True,
+        skip_self=False))
+
+def _flatten(node, path, tables):
+    commands, flags, values, takes_value, positional = tables
+    commands[path] = " ".join(node.commands)
+    flags[path] = " ".join(node.flags)
+    positional[path] = " ".join(node.positional)
+    for flag, choices in node.values.items():
+        values[f"{path}|{flag}"] = " ".join(choices)
+    for flag in node.takes_value:
+        takes_value[f"{path}|{flag}"] = "1"
+    for name, child in node.commands.items():
+        _flatten(child, f"{path.rstrip('/')}/{name}", tables)
+
+def _assoc_array(shell, name, items):
+    if shell == "zsh":
+        pairs = " ".join(f"{shlex.quote(k)} {shlex.quote(v)}"
+                         for k, v in items.items())
+        return f"typeset -gA {name}\n{name}=( {pairs} )"
+    pairs = " ".join(f"[{shlex.quote(k)}]={shlex.quote(v)}"
+                     for k, v in items.items())
+    return f"declare -gA {name}=( {pairs} )"
+
+_function_template = """\
+{fn}() {{
+    local cur prev node word key i
+    cur="${{COMP_WORDS[COMP_CWORD]}}"
+    prev="${{COMP_WORDS[COMP_CWORD-1]}}"
+    node="/"
+    for ((i=1; i<COMP_CWORD; i++)); do
+        word="${{COMP_WORDS[i]}}"
+        key="${{node%/}}/$word"
+        if [[ "$word" == "-" ]]; then
+            node="/"
+        elif [[ -n "${{{fn}_takes_value[$node|$word]+x}}" ]]; then
+            ((i++))
+        elif [[ -n "${{{fn}_commands[$key]+x}}" ]]; then
+            node="$key"
+        fi
+    done
+    if [[ -n "${{{fn}_values[$node|$prev]+x}}" ]]; then
+        COMPREPLY=( $(compgen -W "${{{fn}_values[$node|$prev]}}" -- "$cur") )
+    elif [[ "$cur" == -* ]]; then
+        COMPREPLY=( $(compgen -W "${{{fn}_flags[$node]}}" -- "$cur") )
+    elif [[ -z "${{{fn}_takes_value[$node|$prev]+x}}" ]]; then
+        COMPREPLY=( $(compgen -W \\
+            "${{{fn}_commands[$node]}} ${{{fn}_positional[$node]}}" \\
+            -- "$cur") )
+    fi
+}}
+complete -F {fn} {names}
+"""
+
+# Generate a static bash or zsh completion script for a component
+def script(component, name, shell="bash"):
+    if shell not in ["bash", "zsh"]:
+        raise ValueError(f"unsupported shell: {shell}")
+    tables = ({}, {}, {}, {}, {})
+    _flatten(completion_tree(component), "/", tables)
+    fn = "_ticli_" + re.sub(r"\W", "_", name)
+    lines = [f"# {shell} completion for {name}, generated by ticli"]
+    if shell == "zsh":
+        lines.append("autoload -U +X bashcompinit && bashcompinit")
+    for suffix, items in zip(
+            ["commands", "flags", "values", "takes_value", "positional"],
+            tables):
+        lines.append(_assoc_array(shell, f"{fn}_{suffix}", items))
+    names = " ".join(shlex.quote(n) for n in [name, f"./{name}"])
+    lines.append(_function_template.format(fn=fn, names=names))
+    return "\n".join(lines)
@@ -0,0 +1,326 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Native command-line dispatcher for option groups.
+
+Resolves argument vectors against parse tables built from the metadata that
+option.group records, following the same parsing rules as Python Fire, and
+hands anything it does not understand to a fallback (normally Fire).
+"""
+
+import ast
+import inspect
+from . import aio
+from . import trace
+from . import types
+
+# Fire's separator for ending the argument list of the current component
+separator = "-"
+
+# Tokens that request Fire features the native dispatcher does not provide
+_fire_only_tokens = {"--", "-h", "--help"}
+
+# Parsed argument specification for one callable
+class _Call_Entry:
+    def __init__(self, sig, accepts_positional_args, skip_self=True):
+        params = list(sig.parameters.values())
+        if skip_self:
+            params = params[1:]
+        self.accepts_positional_args = accepts_positional_args
+        self.positional_names = []
+        self.num_required = 0
+        self.required_kwonly = set()
+        self.names = set()
+        self.bool_names = set()
+        # Names of Choice parameters, which keep the command-line word as is
+        # (so that a choice such as 1.10 is not parsed as the number 1.1)
+        self.raw_names = set()
+        self.annotations = {}
+        self.supported = True
+        for p in params:
+            if p.kind in [ inspect.Parameter.VAR_POSITIONAL,
+                           inspect.Parameter.VAR_KEYWORD,
+                           inspect.Parameter.POSITIONAL_ONLY ]:
+                # Leave variable arguments to fire
+                self.supported = False
+                continue
+            self.names.add(p.name)
+            self.annotations[p.name] = p.annotation
+            if p.annotation is bool:
+                self.bool_names.add(p.name)
+            elif isinstance(p.annotation, types.Choice):
+                self.raw_names.add(p.name)
+            if p.kind == inspect.Parameter.KEYWORD_ONLY:
+                if p.default is inspect.Parameter.empty:
+                    self.required_kwonly.add(p.name)
+            else:
+                self.positional_names.append(p.name)
+                if p.default is inspect.Parameter.empty:
+                    self.num_required = len(self.positional_names)
+
+    def _value(self, name, word):
+        return word if name in self.raw_names else parse_value(word)
+
+    # Parse the arguments for this callable from the start of the token
+    # list.  Returns (kw, remaining_tokens), or None if fire should handle
+    # the tokens instead.
+    def parse(self, tokens):
+        if not self.supported:
+            return None
+
+        # Only use arguments up to the separator for this callable
+        saved = []
+        used_separator = separator in tokens
+        if used_separator:
+            index = tokens.index(separator)
+            saved = tokens[index + 1:]
+            tokens = tokens[:index]
+
+        # Collect keyword arguments supplied as flags, keeping unknown flags
+        # (and their values) for the following components
+        kw = {}
+        positional = []
+        remaining_flags = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if not _is_flag(token):
+                positional.append(token)
+                i += 1
+                continue
+            name, has_equals, value = token[2:].partition("=")
+            name = name.replace("-", "_")
+            next_is_value = i + 1 < len(tokens) and \
+                not _is_flag(tokens[i + 1])
+            if name not in self.names:
+                if name.startswith("no") and name[2:] in self.bool_names \
+                   and not has_equals:
+                    kw[name[2:]] = False
+                    i += 1
+                    continue
+                if not token.startswith("--"):
+                    # Abbreviated flags are left to fire
+                    return None
+                remaining_flags.append(token)
+                if next_is_value and not has_equals:
+                    i += 1
+                    remaining_flags.append(tokens[i])
+                i += 1
+                continue
+            if has_equals:
+                kw[name] = self._value(name, value)
+            elif name in self.bool_names and not (
+                    next_is_value and
+                    isinstance(parse_value(tokens[i + 1]), bool)):
+                # Boolean flags only consume an explicit True/False value
+                kw[name] = True
+            elif next_is_value:
+                i += 1
+                kw[name] = self._value(name, tokens[i])
+            else:
+                return None
+            i += 1
+
+        # Fill the remaining parameters from positional arguments
+        for index, name in enumerate(self.positional_names):
+            if name in kw:
+                continue
+            if positional and self.accepts_positional_args:
+                kw[name] = self._value(name, positional.pop(0))
+            elif index < self.num_required:
+                return None
+        if self.required_kwonly - set(kw):
+            return None
+
+        # Add back in the arguments from after the separator
+        remaining = positional + remaining_flags
+        if used_separator:
+            if remaining:
+                remaining = remaining + [separator] + saved
+            else:
+                remaining = saved
+        return kw, remaining
+
+# Parse table for an option group class
+class _Parse_Table:
+    def __init__(self, cls):
+        # The __init__ and __call__ signatures for fire do not include self
+        self.init = _Call_Entry(
+            cls._init_sig, accepts_positional_args=False, skip_self=False)
+        self.call = _Call_Entry(
+            cls._call_sig,
+            accepts_positional_args=cls._post_call_has_positional_args,
+            skip_self=False)
+        self.methods = {}
+        # Names of subgroups declared with option.subgroup()
+        self.subgroups = set()
+        for name in dir(cls):
+            if name.startswith("_") or name in cls._option_names:
+                continue
+            member = getattr(cls, name)
+            if getattr(member, "_is_lazy_subgroup", False):
+                self.subgroups.add(name)
+            elif inspect.isfunction(member):
+                self.methods[name] = _Call_Entry(
+                    inspect.signature(member), accepts_positional_args=True)
+
+# Parse tables are built once per class
+_parse_tables = {}
+
+def parse_table_for(cls):
+    table = _parse_tables.get(cls)
+    if table is None:
+        table = _Parse_Table(cls)
+        _parse_tables[cls] = table
+    return table
+
+def _is_group(obj):
+    return getattr(obj, "_is_option_group", False)
+
+# Return True if a group method was marked with option.independent
+def _is_independent(method):
+    method = getattr(method, "_unvalidated", method)
+    return getattr(method, "_independent", False)
+
+def _is_flag(token):
+    if not token.startswith("-") or token == separator:
+        return False
+    if token.startswith("--") and len(token) > 2:
+        return True
+    # Negative numbers are values, other single-dash tokens are flags
+    try:
+        float(token)
+        return False
+    except ValueError:
+        return True
+
+# Convert bare words inside an expression into strings, as fire does
+class _Bare_Words_To_Strings(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id in ["True", "False", "None"]:
+            return node
+        return ast.copy_location(ast.Constant(node.id), node)
+
+# Parse a command-line word into a value the way fire does
+def parse_value(value):
+    try:
+        tree = ast.parse(value, mode="eval")
+        tree = _Bare_Words_To_Strings().visit(tree)
+        return ast.literal_eval(tree)
+    except (SyntaxError, ValueError, TypeError, MemoryError,
+            RecursionError):
+        return value
+
+# Print the final result of a command the way fire would, streaming
+# iterators, lists, and sets in the given line format (see ticli.stream)
+def _print_result(result, output="plain"):
+    from . import stream
+    if result is None or _is_group(result):
+        return
+    if stream.is_streamable(result):
+        stream.write_stream(result, output)
+    elif isinstance(result, dict):
+        for k, v in result.items():
+            print(f"{k}: {v}")
+    else:
+        print(result)
+
+# Dispatch an argument vector to a component.  The fallback is called as
+# fallback(component, remaining_args) for anything that cannot be handled
+# natively, and its return value is returned.  Results are printed using
+# the given output format.  If an executor is given, consecutive independent
+# steps of a chain are run concurrently on it (see ticli.parallel).
+def dispatch(component, argv, fallback, output="plain", executor=None):
+    argv = list(argv)
+    if not argv or _fire_only_tokens.intersection(argv):
+        return fallback(component, argv)
+
+    # Construct the root group, if necessary
+    if inspect.isclass(component) and _is_group(component):
+        parsed = parse_table_for(component).init.parse(argv)
+        if parsed is None:
+            return fallback(component, argv)
+        kw, argv = parsed
+        component = aio.ready(component(**kw))
+    elif inspect.isfunction(component):
+        entry = _Call_Entry(
+            inspect.signature(component), accepts_positional_args=True,
+            skip_self=False)
+        parsed = entry.parse(argv)
+        if parsed is None:
+            return fallback(component, argv)
+        kw, argv = parsed
+        component = aio.resolve(component(**kw))
+    elif not _is_group(component):
+        return fallback(component, argv)
+    else:
+        component = aio.ready(component)
+
+    # Step through the chain of members and calls, collecting independent
+    # steps into a plan when running them in parallel
+    called = False
+    planned = []
+    def run_planned(component):
+        from .parallel import run_steps
+        result = run_steps(planned, executor)
+        planned.clear()
+        return component if result is None else result
+    while argv:
+        if not _is_group(component):
+            if planned:
+                component = run_planned(component)
+                continue
+            return fallback(component, argv)
+        start = trace.now() if trace.enabled else None
+        table = parse_table_for(type(component))
+        name = argv[0]
+        if name in table.methods:
+            parsed = table.methods[name].parse(argv[1:])
+            if parsed is None:
+                if planned:
+                    component = run_planned(component)
+                    continue
+                return fallback(component, argv)
+            kw, argv = parsed
+            next_component = getattr(component, "_next_in_chain", None)
+            if executor is not None and _is_group(next_component) and \
+               _is_independent(getattr(type(component), name)):
+                planned.append((component, name, kw))
+                component = next_component
+            else:
+                if planned:
+                    run_planned(component)
+                component = aio.resolve(getattr(component, name)(**kw))
+            called = True
+        elif not _is_flag(name) and (name in table.subgroups or _is_group(
+                component.__dict__.get(name))):
+            if planned:
+                run_planned(component)
+            component = aio.ready(getattr(component, name))
+            argv = argv[1:]
+            called = False
+        else:
+            if planned:
+                component = run_planned(component)
+                continue
+            parsed = table.call.parse(argv)
+            if parsed is None or parsed[1] == argv:
+                return fallback(component, argv)
+            kw, argv = parsed
+            component = aio.resolve(component(**kw))
+            called = True
+        if start is not None:
+            trace.emit("chain-step", start, step=name)
+
+    if planned:
+        component = run_planned(component)
+
+    # A command accessed as a member is invoked even without arguments
+    if not called and getattr(component, "_is_command", False):
+        component = aio.resolve(component())
+    _print_result(component, output)
+    return component
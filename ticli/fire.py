@@ -25,12 +25,20 @@ except:
     Fire = dummy
     decorators = Dummy()
     decorators._SetMetadata = dummy
+    decorators.GetMetadata = lambda fn: {}
+    decorators.FIRE_METADATA = "FIRE_METADATA"
+    decorators.ACCEPTS_POSITIONAL_ARGS = "ACCEPTS_POSITIONAL_ARGS"
     decorators.FIRE_DEFAULTS_DICT = "FIRE_DEFAULTS_DICT"
     decorators.FIRE_STAND_IN = "FIRE_STAND_IN"
     decorators.FIRE_VALUE_TYPE = "FIRE_VALUE_TYPE"
 
 _Fire = Fire
-def Fire(component, *args, **kw):
+# The output argument selects the line format used to stream iterator,
+# list, and set results ("plain", "jsonl", or "tsv"; see ticli.stream).  The
+# parallel argument ("thread", "process", or a concurrent.futures executor)
+# runs independent chain steps concurrently (see ticli.parallel).
+def Fire(component, *args, native=True, batch=None, output="plain",
+         parallel=None, **kw):
     # Work-around to keep fire from using "less" to show help output
     import os
     os.environ["PAGER"] = "cat"
@@ -39,9 +47,136 @@ def Fire(component, *args, **kw):
     if inspect.isfunction(component):
         component = validate_arguments(component)
         
-    # Provide exception handling for validation errors
     import ticli.validation as v
+    # Share path lookups among the steps of each invocation
+    from .types import path_cache
+
+    executor = None
+    if parallel is not None:
+        from .parallel import executor_for
+        executor, owned = executor_for(parallel)
+        if owned:
+            import atexit
+            atexit.register(executor.shutdown)
+
+    # Run each command line from a batch source ("-" for stdin, a file name,
+    # or an iterable of lines), reporting errors without stopping
+    if batch is not None:
+        from .batch import run_batch
+        def run(component, argv):
+            try:
+                with path_cache():
+                    _run(component, (), {"command": argv}, native, output,
+                         executor)
+            except v.ValidationError as exc:
+                v.print_validation_error(exc)
+                raise v.Invalid_Arguments()
+        try:
+            results = run_batch(component, batch, run)
+        finally:
+            _close_event_loop()
+        if any(exit_code for line_number, exit_code in results):
+            import sys
+            sys.exit(1)
+        return results
+
+    # Provide exception handling for validation errors
     try:
-        _Fire(component, *args, **kw)
+        with path_cache():
+            _run(component, args, kw, native, output, executor)
     except v.ValidationError as exc:
         v.print_validation_error(exc)
+    finally:
+        _close_event_loop()
+
+# Close the event loop used for asynchronous commands, if one was created
+def _close_event_loop():
+    import sys
+    aio = sys.modules.get(f"{__package__}.aio")
+    if aio is not None:
+        aio.close()
+
+# Return True if a component has asynchronous members, which are only run
+# to completion by the native dispatcher and the serialize hook below
+def _is_async(component):
+    if inspect.iscoroutinefunction(component):
+        return True
+    cls = component if inspect.isclass(component) else type(component)
+    if not getattr(cls, "_is_option_group", False):
+        return False
+    return any(inspect.iscoroutinefunction(getattr(cls, name, None))
+               for name in dir(cls)
+               if not name.startswith("_") or
+               name in ["__post_init__", "__post_call__"])
+
+# Return a fire serialize function that runs awaitable results to completion
+# and streams results (printing nothing more for them), if the installed
+# fire supports one
+def _stream_serializer(output):
+    from . import stream
+    try:
+        if "serialize" not in inspect.signature(_Fire).parameters:
+            return None
+    except (TypeError, ValueError):
+        return None
+    def serialize(result):
+        from .aio import resolve
+        result = resolve(result)
+        if stream.is_streamable(result):
+            stream.write_stream(result, output)
+            return None
+        return result
+    return serialize
+
+def _run(component, args, kw, native, output="plain", executor=None):
+    import os
+    import sys
+    # Try the native dispatcher first, unless fire-specific arguments were
+    # supplied, and fall back to fire for anything it cannot handle
+    if native and not args and set(kw) <= {"command"}:
+        from .dispatch import dispatch
+        argv = kw.get("command")
+        if argv is None:
+            argv = sys.argv[1:]
+        elif isinstance(argv, str):
+            import shlex
+            argv = shlex.split(argv)
+        name = os.path.basename(sys.argv[0])
+        # Generate a static completion script for "-- --completion [SHELL]"
+        if "--" in argv:
+            fire_flags = argv[argv.index("--") + 1:]
+            if fire_flags[:1] == ["--completion"]:
+                from .completion import script
+                shell = fire_flags[1] if len(fire_flags) > 1 else "bash"
+                print(script(component, name, shell))
+                return
+            # Write the help manifest for "-- --help-manifest"
+            if fire_flags[:1] == ["--help-manifest"]:
+                from .manifest import write_manifest
+                source_path = inspect.getsourcefile(
+                    component if inspect.isclass(component) or
+                    inspect.isfunction(component) else type(component))
+                print(write_manifest(component, source_path))
+                return
+        serialize = _stream_serializer(output)
+        def fallback(component, argv):
+            if serialize is None:
+                result = _Fire(component, command=argv, name=name)
+                if inspect.iscoroutine(result):
+                    result.close()
+                    raise RuntimeError(
+                        "asynchronous results require a fire version with "
+                        "serialize support or the native dispatcher")
+                return result
+            return _Fire(component, command=argv, name=name,
+                         serialize=serialize)
+        dispatch(component, argv, fallback, output, executor)
+    else:
+        if _is_async(component):
+            raise ValueError(
+                "asynchronous commands require the native dispatcher "
+                "(native=True)")
+        serialize = _stream_serializer(output)
+        if serialize is not None and "serialize" not in kw:
+            kw["serialize"] = serialize
+        _Fire(component, *args, **kw)
@@ -0,0 +1,283 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Precompiled help manifests.
+
+A manifest holds the parsed help (options, types, defaults, descriptions, and
+subcommands) of every group and command of a program, keyed by hashes of the
+program source and of the source files of every module defining one of its
+groups (including their bases and lazily imported subgroups).  Generate it
+with:
+
+    ./program.py -- --help-manifest
+
+and call help_from_manifest() at the top of the program, before the option
+groups are defined:
+
+    import ticli
+    ticli.help_from_manifest(__file__)
+
+When the manifest is fresh, --help is then rendered from the manifest
+without importing pydantic or running the decorators.
+"""
+
+import os
+import sys
+import json
+import hashlib
+
+# Flags that request help output
+_help_flags = ["--help", "-h"]
+
+def manifest_path_for(source_path):
+    return os.path.splitext(source_path)[0] + ".help.json"
+
+def source_hash(source_path):
+    with open(source_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# Split a Google-style docstring into a summary, a description, and a
+# dictionary of argument descriptions
+def _parse_doc(doc):
+    import inspect
+    lines = inspect.cleandoc(doc or "").splitlines()
+    summary = ""
+    description = []
+    args = {}
+    current = None
+    in_args = False
+    args_indent = None
+    for line in lines:
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if stripped == "Args:":
+            in_args = True
+            current = None
+            args_indent = None
+            continue
+        if in_args and stripped and indent == 0:
+            in_args = False
+        if in_args:
+            if not stripped:
+                continue
+            if args_indent is None:
+                args_indent = indent
+            name, sep, text = stripped.partition(":")
+            if indent <= args_indent and sep and name.isidentifier():
+                current = name
+                args[name] = text.strip()
+            elif current:
+                args[current] += " " + stripped
+        elif not summary:
+            summary = stripped
+        else:
+            description.append(line)
+    return summary, "\n".join(description).strip(), args
+
+def _type_name(annotation):
+    import inspect
+    if annotation is inspect.Parameter.empty:
+        return ""
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return str(annotation).replace("typing.", "")
+
+def _params_help(sig, arg_docs, skip_self):
+    import inspect
+    params = list(sig.parameters.values())
+    if skip_self:
+        params = params[1:]
+    result = []
+    for p in params:
+        if p.kind in [ inspect.Parameter.VAR_POSITIONAL,
+                       inspect.Parameter.VAR_KEYWORD ]:
+            continue
+        required = p.default is inspect.Parameter.empty
+        result.append({
+            "name": p.name,
+            "type": _type_name(p.annotation),
+            "default": None if required else repr(p.default),
+            "required": required,
+            "positional": p.kind != inspect.Parameter.KEYWORD_ONLY,
+            "description": arg_docs.get(p.name, ""),
+        })
+    return result
+
+def _node_help(doc, sig, skip_self, accepts_positional_args):
+    summary, description, arg_docs = _parse_doc(doc)
+    return {
+        "summary": summary,
+        "description": description,
+        "params": _params_help(sig, arg_docs, skip_self),
+        "accepts_positional_args": accepts_positional_args,
+        "commands": {},
+    }
+
+# Add the source files of the classes a group class is built from
+def _add_sources(cls, sources):
+    import inspect
+    for c in cls.__mro__:
+        try:
+            path = inspect.getsourcefile(c)
+        except TypeError:
+            # Built-in class
+            continue
+        if path is not None:
+            sources.add(os.path.abspath(path))
+
+def _group_help(g, seen, sources):
+    import inspect
+    from .dispatch import parse_table_for
+    from .option import (
+        instantiate_lazy_subgroups, subgroups_of, try_instantiate)
+    cls = g if inspect.isclass(g) else type(g)
+    _add_sources(cls, sources)
+    if inspect.isclass(g):
+        node = _node_help(cls.__doc__, cls._init_sig, False, False)
+    else:
+        node = _node_help(cls.__doc__, cls._call_sig, False,
+                          cls._post_call_has_positional_args)
+    for name in parse_table_for(cls).methods:
+        method = getattr(cls, name)
+        node["commands"][name] = _node_help(
+            method.__doc__, inspect.signature(method), True, True)
+    instance = try_instantiate(g) if inspect.isclass(g) else g
+    if instance is not None:
+        instantiate_lazy_subgroups(instance)
+        seen.add(id(instance))
+        for name, value in subgroups_of(instance, seen, False):
+            node["commands"][name] = _group_help(value, seen, sources)
+    return node
+
+# Collect the help information for a component, adding the source files it
+# was built from to sources if given
+def collect_help(component, sources=None):
+    import inspect
+    if sources is None:
+        sources = set()
+    if getattr(component, "_is_option_group", False):
+        return _group_help(component, set(), sources)
+    return _node_help(component.__doc__, inspect.signature(component),
+                      False, True)
+
+# Write the help manifest for a component defined in the given source file
+def write_manifest(component, source_path, manifest_path=None):
+    if manifest_path is None:
+        manifest_path = manifest_path_for(source_path)
+    sources = {os.path.abspath(source_path)}
+    help_node = collect_help(component, sources)
+    # Record the sources relative to the program, so that the program and
+    # its manifest can be moved together
+    base = os.path.dirname(os.path.abspath(source_path))
+    manifest = {
+        "sources": {os.path.relpath(path, base): source_hash(path)
+                    for path in sorted(sources)},
+        "help": help_node,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    return manifest_path
+
+# Load a manifest, returning None if it is missing or out of date
+def load_manifest(source_path, manifest_path=None):
+    if manifest_path is None:
+        manifest_path = manifest_path_for(source_path)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    sources = manifest.get("sources")
+    if not sources:
+        return None
+    base = os.path.dirname(os.path.abspath(source_path))
+    for path, digest in sources.items():
+        try:
+            if source_hash(os.path.join(base, path)) != digest:
+                return None
+        except OSError:
+            return None
+    return manifest
+
+def _indent(text, amount):
+    return "\n".join(" " * amount + line if line else line
+                     for line in text.splitlines())
+
+# Render the help text for a node in the style of fire's help output
+def render_help(node, name):
+    sections = []
+    title = name
+    if node["summary"]:
+        title += f" - {node['summary']}"
+    sections.append("NAME\n" + _indent(title, 4))
+
+    positional = [p for p in node["params"]
+                  if p["positional"] and node["accepts_positional_args"]]
+    flags = [p for p in node["params"] if p not in positional]
+    synopsis = name
+    for p in positional:
+        synopsis += f" {p['name'].upper()}" if p["required"] else \
+            f" [{p['name'].upper()}]"
+    if flags:
+        synopsis += " <flags>"
+    if node["commands"]:
+        synopsis += " COMMAND"
+    sections.append("SYNOPSIS\n" + _indent(synopsis, 4))
+
+    if node["description"]:
+        sections.append("DESCRIPTION\n" + _indent(node["description"], 4))
+
+    def describe(p, label):
+        lines = [label]
+        if p["type"]:
+            lines.append(f"    Type: {p['type']}")
+        if not p["required"]:
+            lines.append(f"    Default: {p['default']}")
+        if p["description"]:
+            lines.append(f"    {p['description']}")
+        return "\n".join(lines)
+
+    if positional:
+        sections.append("POSITIONAL ARGUMENTS\n" + "\n".join(
+            _indent(describe(p, p["name"].upper()), 4) for p in positional))
+    if flags:
+        sections.append("FLAGS\n" + "\n".join(
+            _indent(describe(p, f"--{p['name']}={p['name'].upper()}"), 4)
+            for p in flags))
+    if node["commands"]:
+        lines = ["COMMAND is one of the following:", ""]
+        for command, child in node["commands"].items():
+            lines.append(f" {command}")
+            if child["summary"]:
+                lines.append(f"   {child['summary']}")
+        sections.append("COMMANDS\n" + _indent("\n".join(lines), 4))
+    return "\n\n".join(sections)
+
+# Print help from a fresh manifest and exit if help was requested
+def help_from_manifest(source_path, argv=None, manifest_path=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not any(flag in argv for flag in _help_flags):
+        return
+    manifest = load_manifest(source_path, manifest_path)
+    if manifest is None:
+        return
+
+    # Follow the command words before the help flag
+    node = manifest["help"]
+    name = os.path.basename(sys.argv[0])
+    for word in argv:
+        if word in _help_flags:
+            break
+        if word == "-":
+            node = manifest["help"]
+            name = os.path.basename(sys.argv[0])
+        elif word in node["commands"]:
+            node = node["commands"][word]
+            name += f" {word}"
+    print(render_help(node, name))
+    sys.exit(0)
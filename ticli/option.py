@@ -4,26 +4,71 @@
 
 # Author: Jeff Webb <jeff.webb@codecraftsmen.org>
 
-import sys
 import inspect
+import collections
+from types import MappingProxyType
 from makefun import with_signature
 from decopatch import class_decorator, DECORATED
 from .validation import (
     check_type,
+    check_types,
+    create_arguments_model,
     print_validation_error,
-    ValidationError,
     validate_arguments,
     validate_method_arguments,
 )
 from . import fire
+from . import trace
+from . import validation
+
+# Option values of a group instance: a small dictionary of the values set on
+# the instance, in front of the read-only option defaults shared by all
+# instances of the group.  Restoring the defaults only empties the front
+# dictionary.
+class _Option_Data(collections.ChainMap):
+    def __init__(self, defaults):
+        self.overrides = {}
+        self.defaults = defaults
+        super().__init__(self.overrides, defaults)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+# Data descriptor that stores an option value in the _option_data dictionary
+# of a group instance (which fire also uses for the defaults shown in help)
+# and checks the type of newly assigned values.  Derived from property so
+# that fire treats it like one and does not list it as a class member.
+class _Option_Attribute(property):
+    def __init__(self, name, type_annotation):
+        self.name = name
+        self.type_annotation = type_annotation
+        super().__init__(self._get, self._set)
+
+    def _get(self, obj):
+        # Look in the two layers directly, which is faster than ChainMap
+        data = obj._option_data
+        try:
+            if self.name in data.overrides:
+                return data.overrides[self.name]
+            return data.defaults[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def _set(self, obj, value):
+        start = trace.now() if trace.enabled else None
+        try:
+            check_type(self.name, value, self.type_annotation)
+        except validation.ValidationError as exc:
+            print_validation_error(exc, value=value)
+            raise validation.Invalid_Arguments()
+        obj._option_data.overrides[self.name] = value
+        if start is not None:
+            trace.emit("option-set", start, group=type(obj).__name__,
+                       options={self.name: value})
 
-_debug_print = False
-def _print(*args, **kw):
-    if _debug_print:
-        print(*args, **kw)
-    
 @class_decorator
 def group(C=DECORATED, next_in_chain_param_name="next_in_chain"):
+    start = trace.now() if trace.enabled else None
 
     # Add validation for public methods
     for name, member in dict(C.__dict__).items():
@@ -52,7 +97,7 @@ def group(C=DECORATED, next_in_chain_param_name="next_in_chain"):
     # default values
     new_option_values = {}
     for opt_name in new_option_names:
-        if hasattr(C, opt_name):
+        if opt_name in C.__dict__:
             opt_value = getattr(C, opt_name)
             new_option_values[opt_name] = opt_value
             delattr(C, opt_name)
@@ -136,11 +181,20 @@ def group(C=DECORATED, next_in_chain_param_name="next_in_chain"):
     class D(C):
         # Mark class as an option class
         _is_option_group = True
+        _is_command = False
         
         # Capture info about options for later use
         _option_types = option_types
         _option_values = option_values
         _option_names = option_names
+
+        # Default option values, shared by all instances
+        _option_defaults = MappingProxyType(
+            {p.name: p.default for p in option_params})
+
+        # Model used to validate all supplied options at once
+        _options_model = create_arguments_model(
+            f"{C.__name__}_Options", option_types)
         
         # Provide default implementations for required methods, if necessary
         if hasattr(C, "__post_init__"):
@@ -169,51 +223,57 @@ def group(C=DECORATED, next_in_chain_param_name="next_in_chain"):
 
         # Extract the __post_init__ parameter names
         _post_init_param_names = list(_post_init_sig.parameters.keys())[1:]
+        _async_post_init = inspect.iscoroutinefunction(__post_init__)
         
         # Define an __init__() that handles any supplied options before
         # calling __post_init__() without the option parameters.
         def __init__(self, *args, **kw):
-            self._option_data = {}
-            # Tell fire to use the current option values as defaults
-            fire.decorators._SetMetadata(
-                self, fire.decorators.FIRE_DEFAULTS_DICT,
-                self._option_data)
-            # Tell fire to use the desired signature for __call__
-            fire.decorators._SetMetadata(
-                self, fire.decorators.FIRE_STAND_IN, D._dummy_call)
-            # Check if any positional arguments for __post_call__ are defined
-            post_call_has_positional_args = False
-            for param_name, param_val in \
-                self._post_call_sig.parameters.items():
-                if param_name == "self":
-                    continue
-                if param_val.default == inspect.Parameter.empty:
-                    post_call_has_positional_args = True
-            if post_call_has_positional_args:
-                # Tell fire to allow positional arguments for __call__
-                fire.decorators._SetMetadata(
-                    self, fire.decorators.ACCEPTS_POSITIONAL_ARGS,
-                    D._dummy_call)
-            _print(f"__init__ args: {args}")
-            _print(f"         kw: {kw}")
-            _print(f"         option_data: {self._option_data}")
+            start = trace.now() if trace.enabled else None
+            # Start from the shared option defaults
+            self._option_data = _Option_Data(D._option_defaults)
+            # Attach the precompiled fire metadata, telling fire to use the
+            # current option values as defaults
+            metadata = dict(D._init_metadata)
+            metadata[fire.decorators.FIRE_DEFAULTS_DICT] = self._option_data
+            setattr(self, fire.decorators.FIRE_METADATA, metadata)
             option_kw = self._extract_option_kw(kw)
             self._handle_and_remove_option_group_kw(kw)
-            self._set_missing_option_attrs_from_defaults()
-            self._set_option_attrs_from_args(**option_kw)
+            # Report option and argument errors together before exiting
+            failed = not self._try_set_option_attrs_from_args(option_kw)
             try:
                 self._validate_post_init_args(*args, **kw)
-            except ValidationError as exc:
+            except validation.ValidationError as exc:
                 print_validation_error(
                     exc, value_dict=kw,
                     arg_names=self._post_init_param_names, arg_values=args)
-                sys.exit(-1)
-            return self.__post_init__(*args, **kw)
+                failed = True
+            if failed:
+                raise validation.Invalid_Arguments()
+            # Record the __post_init__ arguments, which determine the state
+            # of the instance along with the options (see ticli.cache)
+            self._post_init_arguments = (args, kw)
+            if D._async_post_init:
+                # Keep the coroutine so that it can be awaited later if
+                # constructed in a running event loop, and otherwise finish
+                # it now, along with those of any subgroups (see ticli.aio)
+                from . import aio
+                self._pending_init = self.__post_init__(*args, **kw)
+                if not aio.in_running_loop():
+                    aio.ready(self)
+                return
+            if start is None:
+                return self.__post_init__(*args, **kw)
+            try:
+                return self.__post_init__(*args, **kw)
+            finally:
+                trace.emit("init", start, group=D.__name__, args=args,
+                           kw=kw, options=option_kw)
 
-        @validate_method_arguments
         @with_signature(inspect.signature(__post_init__))
         def _validate_post_init_args(self, *args, **kw):
             pass
+        _validate_post_init_args = validate_method_arguments(
+            _validate_post_init_args, event="validate")
         
         # Construct a __call__() signature for use with fire
         _post_call_sig = inspect.signature(__post_call__)
@@ -224,35 +284,47 @@ def group(C=DECORATED, next_in_chain_param_name="next_in_chain"):
         
         # Extract the __post_call__ parameter names
         _post_call_param_names = list(_post_call_sig.parameters.keys())[1:]
+
+        # Model used to validate the arguments of prepared calls
+        _post_call_model = create_arguments_model(
+            f"{C.__name__}_Call_Arguments", _param_types(_post_call_sig))
                 
         # Define a __call__() that handles any supplied options before
         # calling __post_call__() without the option parameters.
         def __call__(self, *args, **kw):
-            _print(f"__call__ args: {args}")
-            _print(f"         kw: {kw}")
-            _print(f"         option_data: {self._option_data}")
+            start = trace.now() if trace.enabled else None
             option_kw = self._extract_option_kw(kw)
-            self._set_option_attrs_from_args(**option_kw)
+            # Report option and argument errors together before exiting
+            failed = not self._try_set_option_attrs_from_args(option_kw)
             try:
                 self._validate_post_call_args(*args, **kw)
-            except ValidationError as exc:
+            except validation.ValidationError as exc:
                 print_validation_error(
                     exc, value_dict=kw,
                     arg_names=self._post_call_param_names, arg_values=args)
-                sys.exit(-1)
-            return self.__post_call__(*args, **kw)
+                failed = True
+            if failed:
+                raise validation.Invalid_Arguments()
+            if start is None:
+                return self.__post_call__(*args, **kw)
+            try:
+                return self.__post_call__(*args, **kw)
+            finally:
+                trace.emit("call", start, group=type(self).__name__,
+                           args=args, kw=kw, options=option_kw)
         
-        @validate_method_arguments
         @with_signature(inspect.signature(__post_call__))
         def _validate_post_call_args(self, *args, **kw):
             pass
+        _validate_post_call_args = validate_method_arguments(
+            _validate_post_call_args, event="validate")
         
         def _extract_option_kw(self, kw):
-            option_kw = {}
-            for o_name in self._option_names:
-                if o_name in kw:
-                    option_kw[o_name] = kw.pop(o_name)
-            return option_kw
+            # Only look at the supplied arguments, which are usually far
+            # fewer than the options
+            defaults = self._option_defaults
+            return {name: kw.pop(name) for name in list(kw)
+                    if name in defaults}
 
         def _handle_and_remove_option_group_kw(self, kw):
             self._next_in_chain = None
@@ -261,48 +333,81 @@ def group(C=DECORATED, next_in_chain_param_name="next_in_chain"):
                 if self._next_in_chain == "self":
                     self._next_in_chain = self
         
-        def _set_missing_option_attrs_from_defaults(self):
-            _print("  setting missing option attrs from defaults")
-            for p in option_params:
-                _print(f"    {p.name}: {p.default}")
-                self._option_data[p.name] = p.default
-                
         def _set_option_attrs_from_args(self, **kw):
-            _print(f"  setting options from kw args: {kw}")
-            for key, value in kw.items():
-                setattr(self, key, value)
-
-        def __getattr__(self, key):
-            if key in self._option_data:
-                return self._option_data[key]
-            else:
-                raise AttributeError
-            
-        def __setattr__(self, key, value):
-            if key != "_option_data" and key in self._option_data:
-                _print(f"    setting {key} to {value}")
-                try:
-                    check_type(key, value, option_types[key])
-                except ValidationError as exc:
-                    print_validation_error(exc, value=value)
-                    sys.exit(-1)
-                self._option_data[key] = value
+            if not kw:
                 return
-            return super().__setattr__(key, value)
-         
+            start = trace.now() if trace.enabled else None
+            # Validate all supplied options in one pass
+            check_types(kw, self._options_model)
+            self._option_data.overrides.update(kw)
+            if start is not None:
+                trace.emit("option-set", start, group=type(self).__name__,
+                           options=kw)
+
+        def _try_set_option_attrs_from_args(self, option_kw):
+            try:
+                self._set_option_attrs_from_args(**option_kw)
+            except validation.ValidationError as exc:
+                print_validation_error(exc, value_dict=option_kw)
+                return False
+            return True
+
+        def __dir__(self):
+            # Keep options out of the member listing, since fire presents
+            # them as flags rather than as members
+            return [n for n in super().__dir__()
+                    if n not in self._option_defaults]
+            
         def _restore_defaults(self):
-            self._option_data.clear()
-            self._set_missing_option_attrs_from_defaults()
+            self._option_data.overrides.clear()
+
+        # Return the option values set on the instance, for _restore_options
+        def _snapshot_options(self):
+            return dict(self._option_data.overrides)
+
+        def _restore_options(self, snapshot):
+            overrides = self._option_data.overrides
+            overrides.clear()
+            overrides.update(snapshot)
+
+        # Leave the fire metadata (which refers to local functions) and the
+        # shared option defaults out of the pickled state and rebuild them
+        # when unpickling, so that instances can be sent to worker processes
+        def __getstate__(self):
+            state = dict(self.__dict__)
+            state.pop(fire.decorators.FIRE_METADATA, None)
+            state["_option_data"] = self._snapshot_options()
+            return state
+
+        def __setstate__(self, state):
+            self.__dict__.update(state)
+            self._option_data = _Option_Data(type(self)._option_defaults)
+            self._option_data.overrides.update(state["_option_data"])
+            metadata = dict(type(self)._init_metadata)
+            metadata[fire.decorators.FIRE_DEFAULTS_DICT] = self._option_data
+            setattr(self, fire.decorators.FIRE_METADATA, metadata)
             
         # Piece together top-level documentation string
         _options_doc = _make_options_doc(C)
         __doc__ = "\n".join([_options_doc, _make_extra_doc(C)])
+
+    # Present the decorated class under the name and module of the original
+    D.__name__ = C.__name__
+    D.__qualname__ = C.__qualname__
+    D.__module__ = C.__module__
+        
+    # Provide type-checked attribute access for each option
+    for n in option_names:
+        setattr(D, n, _Option_Attribute(n, option_types[n]))
         
     fire.decorators._SetMetadata(
         D, fire.decorators.FIRE_STAND_IN, D._dummy_init)
     fire.decorators._SetMetadata(
         D, fire.decorators.FIRE_VALUE_TYPE, "group")
-    
+    _compile_init_plan(D)
+
+    if start is not None:
+        trace.emit("decorate", start, group=D.__name__)
     return D
 
 @class_decorator
@@ -310,17 +415,372 @@ def command(C=DECORATED):
     D = group(C)
     fire.decorators._SetMetadata(
         D, fire.decorators.FIRE_VALUE_TYPE, "command")
+    D._is_command = True
+    _compile_init_plan(D)
     return D
 
+# Precompute the per-class facts needed by __init__ so that constructing an
+# instance does not have to re-derive them
+def _compile_init_plan(D):
+    # Check if any positional arguments for __post_call__ are defined
+    post_call_has_positional_args = False
+    for param_name, param_val in D._post_call_sig.parameters.items():
+        if param_name == "self":
+            continue
+        if param_val.default == inspect.Parameter.empty:
+            post_call_has_positional_args = True
+
+    D._post_call_has_positional_args = post_call_has_positional_args
+
+    # Start with the class metadata and override the per-instance items
+    metadata = dict(fire.decorators.GetMetadata(D))
+    # Tell fire to use the desired signature for __call__
+    metadata[fire.decorators.FIRE_STAND_IN] = D._dummy_call
+    if post_call_has_positional_args:
+        # Tell fire to allow positional arguments for __call__
+        metadata[fire.decorators.ACCEPTS_POSITIONAL_ARGS] = D._dummy_call
+    D._init_metadata = metadata
+
+# Compile all validators used by an option group class ahead of time (for
+# example, before forking worker processes)
+def precompile_validators(cls):
+    for name in dir(cls):
+        if name in cls._option_names:
+            continue
+        validation.precompile(getattr(cls, name))
+    cls._options_model.compile()
+    for name, type_annotation in cls._option_types.items():
+        validation.compile_validator(name, type_annotation)
+
+# Return the types of the parameters of a method signature (other than self),
+# keyed by parameter name
+def _param_types(sig):
+    import typing
+    types = {}
+    for p in list(sig.parameters.values())[1:]:
+        if p.kind in [ inspect.Parameter.VAR_POSITIONAL,
+                       inspect.Parameter.VAR_KEYWORD ]:
+            continue
+        if p.annotation is inspect.Parameter.empty:
+            types[p.name] = typing.Any
+        else:
+            types[p.name] = p.annotation
+    return types
+
+# Callable returned by prepare_call() that invokes __post_call__ on a group
+# instance whose options and fixed arguments have already been validated
+class _Prepared_Call:
+    def __init__(self, g, args, kw, trusted):
+        self.group = g
+        self.args = args
+        self.kw = kw
+        self.trusted = trusted
+        cls = type(g)
+        self._model = cls._post_call_model
+        # Names of the parameters that receive the positional arguments
+        # supplied for each call
+        self._arg_names = [n for n in cls._post_call_param_names
+                           if n in self._model.arg_types][len(args):]
+        self._post_call = g.__post_call__
+
+    # Validate a dictionary of argument values, exiting on failure
+    def _check(self, values):
+        try:
+            check_types(values, self._model)
+        except validation.ValidationError as exc:
+            print_validation_error(exc, value_dict=values)
+            raise validation.Invalid_Arguments()
+
+    def __call__(self, *args, **kw):
+        start = trace.now() if trace.enabled else None
+        if not self.trusted and (args or kw):
+            values = dict(zip(self._arg_names, args))
+            values.update(kw)
+            self._check(values)
+        if self.kw:
+            kw = {**self.kw, **kw}
+        if start is None:
+            return self._post_call(*self.args, *args, **kw)
+        try:
+            return self._post_call(*self.args, *args, **kw)
+        finally:
+            trace.emit("call", start, group=type(self.group).__name__,
+                       args=self.args + args, kw=kw, options={})
+
+# Bind options and leading __post_call__ arguments of a group or command
+# instance (or of a new instance of a class) once, returning a callable that
+# only validates the remaining arguments on each invocation.  Per-call
+# validation is skipped entirely if trusted is true.
+def prepare_call(g, *args, trusted=False, **kw):
+    if isinstance(g, type):
+        g = g()
+    option_kw = g._extract_option_kw(kw)
+    failed = not g._try_set_option_attrs_from_args(option_kw)
+    prepared = _Prepared_Call(g, args, kw, trusted)
+    values = dict(zip(type(g)._post_call_param_names, args))
+    values.update(kw)
+    if values:
+        try:
+            check_types(values, prepared._model)
+        except validation.ValidationError as exc:
+            print_validation_error(exc, value_dict=values)
+            failed = True
+    if failed:
+        raise validation.Invalid_Arguments()
+    return prepared
+
+# Call a group method (or __post_call__) with keyword arguments that have
+# already been validated
+def _call_unvalidated(g, method, kw):
+    f = getattr(type(g), method)
+    f = getattr(f, "_unvalidated", f)
+    return f(g, **kw)
+
+# Stand-in for a ValidationError, holding errors with adjusted locations
+class _Errors:
+    def __init__(self, errors):
+        self._errors = errors
+
+    def errors(self):
+        return self._errors
+
+# Validate each argument column in one pass, exiting on failure, and return
+# the converted values by argument name.  The columns map argument names to
+# (row_numbers, values) pairs.
+def _check_columns(columns, types):
+    import typing
+    errors = []
+    converted = {}
+    for name, (row_numbers, values) in columns.items():
+        if name not in types:
+            continue
+        try:
+            converted[name] = check_type(
+                name, values, typing.List[types[name]])
+        except validation.ValidationError as exc:
+            for error in exc.errors():
+                error = dict(error)
+                loc = list(error["loc"])
+                if len(loc) > 1 and isinstance(loc[1], int):
+                    loc[1] = row_numbers[loc[1]]
+                error["loc"] = tuple(loc)
+                errors.append(error)
+    if errors:
+        value_dict = {" ".join(str(e) for e in error["loc"]): error["input"]
+                      for error in errors}
+        print_validation_error(_Errors(errors), value_dict=value_dict)
+        raise validation.Invalid_Arguments()
+    return converted
+
+# Reject option values among the row arguments of map_call, since options
+# are set on the group once rather than for each call
+def _check_no_options(g, columns, types):
+    errors = [{"type": "unexpected_keyword_argument", "loc": (name,),
+               "msg": "Options cannot be supplied for each row; set them "
+                      "on the group instead",
+               "input": values[0]}
+              for name, (row_numbers, values) in columns.items()
+              if name in g._option_defaults and name not in types]
+    if errors:
+        print_validation_error(_Errors(errors))
+        raise validation.Invalid_Arguments()
+
+# Yield (first, rows, columns) for chunks of at most chunk_size rows, where
+# first is the number of the first row, rows holds keyword argument
+# dictionaries, and columns holds the same values as (row_numbers, values)
+# pairs by argument name
+def _chunks(rows, chunk_size):
+    import itertools
+    from collections.abc import Mapping
+    if isinstance(rows, Mapping):
+        # Columnar table of argument name -> sequence of values
+        names = list(rows)
+        lengths = {n: len(rows[n]) for n in names}
+        n_rows = min(lengths.values(), default=0)
+        if len(set(lengths.values())) > 1:
+            raise ValueError("Columns have different lengths: " + ", ".join(
+                f"{n!r} has {length} values"
+                for n, length in lengths.items()))
+        for first in range(0, n_rows, chunk_size):
+            row_numbers = range(first, min(first + chunk_size, n_rows))
+            columns = {n: (row_numbers,
+                           list(rows[n][first:first + len(row_numbers)]))
+                       for n in names}
+            chunk = [dict(zip(names, values)) for values in
+                     zip(*(values for _, values in columns.values()))]
+            yield first, chunk, columns
+        return
+    it = iter(rows)
+    first = 0
+    while True:
+        chunk = [dict(row) for row in itertools.islice(it, chunk_size)]
+        if not chunk:
+            return
+        columns = {}
+        for i, row in enumerate(chunk, first):
+            for name, value in row.items():
+                row_numbers, values = columns.setdefault(name, ([], []))
+                row_numbers.append(i)
+                values.append(value)
+        yield first, chunk, columns
+        first += len(chunk)
+
+# Call __post_call__ (or the named method) of a group instance once for each
+# row of arguments, yielding the results lazily.  The rows are either an
+# iterable of keyword argument mappings or a columnar mapping of argument
+# name -> sequence of values (of equal lengths).  Rows are processed in
+# chunks, validating each argument column of a chunk in one pass (skipped if
+# trusted is true), and are run in the given concurrent.futures executor if
+# a pool is supplied.
+# The method receives the validated values converted to the annotated
+# types (or the values as given if trusted is true).
+def map_call(g, rows, method="__post_call__", chunk_size=1024, pool=None,
+             trusted=False):
+    import functools
+    f = getattr(type(g), method)
+    types = _param_types(inspect.signature(f))
+    call = functools.partial(_call_unvalidated, g, method)
+    for first, chunk, columns in _chunks(rows, chunk_size):
+        _check_no_options(g, columns, types)
+        if not trusted:
+            converted = _check_columns(columns, types)
+            for name, values in converted.items():
+                for i, value in zip(columns[name][0], values):
+                    chunk[i - first][name] = value
+        if pool is None:
+            for kw in chunk:
+                yield call(kw)
+        else:
+            yield from pool.map(call, chunk)
+
+# Placeholder for the parent group among the constructor arguments of a
+# subgroup declared with subgroup()
+class _Parent:
+    def __repr__(self):
+        return "option.parent"
+
+parent = _Parent()
+
+# Class attribute that constructs a subgroup the first time it is accessed
+# on a group instance and then stores it in the instance
+class _Lazy_Subgroup:
+    _is_lazy_subgroup = True
+
+    def __init__(self, target, args, kw):
+        self.target = target
+        self.args = args
+        self.kw = kw
+        self.name = None
+        self.package = None
+
+    def __set_name__(self, owner, name):
+        import sys
+        self.name = name
+        module = sys.modules.get(owner.__module__)
+        self.package = getattr(module, "__package__", None)
+
+    # Return the subgroup class, importing its module if necessary
+    def resolve(self):
+        if isinstance(self.target, str):
+            import importlib
+            module_name, sep, class_name = self.target.partition(":")
+            if not sep:
+                module_name, _, class_name = self.target.rpartition(".")
+            module = importlib.import_module(module_name, self.package)
+            self.target = getattr(module, class_name)
+        return self.target
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        cls = self.resolve()
+        args = [obj if a is parent else a for a in self.args]
+        kw = {k: obj if v is parent else v for k, v in self.kw.items()}
+        g = cls(*args, **kw)
+        obj.__dict__[self.name] = g
+        return g
+
+# Declare a subgroup as a class attribute of a group.  The subgroup is a
+# group class, or the dotted import path of one ("package.module.Class" or
+# "package.module:Class", relative to the package of the declaring module if
+# it starts with "."), that is imported and constructed with the given
+# arguments (with option.parent standing for the parent group) only when the
+# attribute is first accessed.
+def subgroup(target, *args, **kw):
+    return _Lazy_Subgroup(target, args, kw)
+
+# Return the subgroups declared with subgroup() for a group class, by name
+def lazy_subgroups(cls):
+    result = {}
+    for name in dir(cls):
+        member = inspect.getattr_static(cls, name, None)
+        if getattr(member, "_is_lazy_subgroup", False):
+            result[name] = member
+    return result
+
+# Construct the declared subgroups of a group instance that have not been
+# accessed yet, skipping any that fail (used when collecting help and
+# completion information)
+def instantiate_lazy_subgroups(g):
+    for name in lazy_subgroups(type(g)):
+        if name not in g.__dict__:
+            try:
+                getattr(g, name)
+            except (Exception, SystemExit):
+                pass
+
+# Yield (name, subgroup) pairs for the group instances held in the
+# attributes of a group instance (such as subcommand groups created in
+# __post_init__), skipping classes, any instance whose id is in seen (checked
+# as the pairs are produced), and private attributes unless include_private
+# is true
+def subgroups_of(g, seen=(), include_private=True):
+    for name, value in list(vars(g).items()):
+        if getattr(value, "_is_option_group", False) and \
+           not isinstance(value, type) and id(value) not in seen and \
+           (include_private or not name.startswith("_")):
+            yield name, value
+
+# Try to construct a group instance (with output suppressed) so that
+# subgroups created in __post_init__ can be discovered, returning None if
+# construction fails
+def try_instantiate(cls):
+    import io
+    import contextlib
+    from .aio import ready
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return ready(cls())
+    except (Exception, SystemExit):
+        return None
+
+# Mark a group method as independent of the other steps of a command chain,
+# so that it may run concurrently with them (see ticli.parallel)
+def independent(f):
+    f._independent = True
+    return f
+
 def restore_defaults_for(s):
     s._restore_defaults()
 
+# Return a checkpoint of the option values of a group, which restore_options
+# brings back.  Only the values set on the group are copied.
+def snapshot_options(s):
+    return s._snapshot_options()
+
+def restore_options(s, snapshot):
+    s._restore_options(snapshot)
+
 def next_in_chain_after(g):
     return g._next_in_chain
 
 def set_next_in_chain_after(g, v):
     g._next_in_chain = v
 
+# Print trace events as they occur
 def enable_debug():
-    global _debug_print
-    _debug_print = True
+    if trace.print_event not in trace._subscribers:
+        trace.subscribe(trace.print_event)
+
+def disable_debug():
+    trace.unsubscribe(trace.print_event)
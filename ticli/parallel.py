@@ -0,0 +1,117 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Parallel execution of independent steps in a command chain.
+
+Methods marked with option.independent must not depend on the effects of
+other steps and must return option.next_in_chain_after(self) (or, as the
+last step of a chain, any result).  When ticli.Fire is given a parallel
+executor, the native dispatcher collects consecutive independent steps of
+a chain into a plan and runs them concurrently on the executor.  The output
+of each step is captured and printed in the original order.  Any other step
+waits for the planned steps to finish before it runs.
+
+Steps run on a process pool work on a copy of the group instance, so any
+changes they make to it are not seen by later steps.
+"""
+
+import io
+import sys
+import inspect
+import threading
+import contextlib
+
+# Stand-in for sys.stdout that sends the output of each thread running a
+# step to the buffer of that step
+class _Step_Output:
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def _target(self):
+        return getattr(self.local, "buffer", None) or self.stream
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+@contextlib.contextmanager
+def _capture(buffer):
+    if isinstance(sys.stdout, _Step_Output):
+        sys.stdout.local.buffer = buffer
+        try:
+            yield
+        finally:
+            sys.stdout.local.buffer = None
+    else:
+        with contextlib.redirect_stdout(buffer):
+            yield
+
+# Run one step with its output captured, returning (output, result,
+# exception).  A result that is the group itself is returned as None so
+# that process pools do not send the group back.
+def _run_step(g, name, kw):
+    buffer = io.StringIO()
+    result = None
+    exception = None
+    with _capture(buffer):
+        try:
+            result = getattr(g, name)(**kw)
+            if inspect.isawaitable(result):
+                import asyncio
+                async def wait(awaitable):
+                    return await awaitable
+                result = asyncio.run(wait(result))
+        except BaseException as exc:
+            exception = exc
+    if result is g:
+        result = None
+    return buffer.getvalue(), result, exception
+
+# Run planned steps, given as (group, method_name, kw) tuples, on an
+# executor, printing their output in order.  Returns the result of the last
+# step (None if it returned its group).
+def run_steps(steps, executor):
+    stdout = sys.stdout
+    proxy = _Step_Output(stdout)
+    sys.stdout = proxy
+    futures = []
+    try:
+        futures = [executor.submit(_run_step, g, name, kw)
+                   for g, name, kw in steps]
+        result = None
+        for future in futures:
+            output, result, exception = future.result()
+            stdout.write(output)
+            if exception is not None:
+                raise exception
+        return result
+    finally:
+        if sys.stdout is proxy:
+            sys.stdout = stdout
+        for future in futures:
+            future.cancel()
+
+# Return (executor, owned) for the parallel argument of ticli.Fire, which is
+# either an executor or "thread" or "process" for a new executor of that kind
+# (owned by the caller, which must shut it down)
+def executor_for(parallel):
+    if not isinstance(parallel, str):
+        return parallel, False
+    from concurrent import futures
+    kinds = {
+        "thread": futures.ThreadPoolExecutor,
+        "process": futures.ProcessPoolExecutor,
+    }
+    if parallel not in kinds:
+        raise ValueError(f"unsupported parallel executor: {parallel}")
+    return kinds[parallel](), True
@@ -0,0 +1,176 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Persistent server mode for ticli programs.
+
+The server loads a component once, listens on a Unix domain socket, and
+runs the argument vectors sent by clients.  Each request is handled in a
+process forked from the warm server, so option state never leaks between
+requests.  The client passes its stdin/stdout/stderr file descriptors along
+with the request, so output is streamed directly to the client's terminal
+or pipe, and the exit code is sent back when the command finishes.
+
+Start a server from a program with:
+
+    ticli.serve(Top, "/tmp/top.sock")
+
+and run commands with:
+
+    python -m ticli.server /tmp/top.sock jump 3 - greet
+"""
+
+import os
+import sys
+import json
+import socket
+
+# Maximum size of a single socket read
+_bufsize = 65536
+
+def _recv_line(conn, data=b""):
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(_bufsize)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+# Walk the option group classes in the component's module so that their
+# validators and parse tables are built once, before any requests are forked
+def _warm(component):
+    import inspect
+    from . import option
+    from .dispatch import parse_table_for
+    module = inspect.getmodule(component)
+    classes = []
+    if module:
+        classes = [ v for v in vars(module).values()
+                    if inspect.isclass(v) and
+                    getattr(v, "_is_option_group", False) ]
+    root = component if inspect.isclass(component) else type(component)
+    if getattr(root, "_is_option_group", False) and root not in classes:
+        classes.append(root)
+    for cls in classes:
+        option.precompile_validators(cls)
+        parse_table_for(cls)
+
+def _handle(component, conn, name):
+    msg, fds, flags, addr = socket.recv_fds(conn, _bufsize, 3)
+    request = json.loads(_recv_line(conn, msg))
+    argv = request["argv"]
+
+    # Attach the client's standard streams
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    sys.stdin = os.fdopen(0, "r", closefd=False)
+    sys.stdout = os.fdopen(1, "w", closefd=False)
+    sys.stderr = os.fdopen(2, "w", closefd=False)
+    if request.get("cwd"):
+        os.chdir(request["cwd"])
+    sys.argv = [name] + argv
+
+    from .fire import Fire
+    exit_code = 0
+    try:
+        Fire(component, command=argv)
+    except SystemExit as exc:
+        if isinstance(exc.code, int):
+            exit_code = exc.code
+        elif exc.code is not None:
+            print(exc.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        exit_code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.sendall(json.dumps({"exit_code": exit_code}).encode() + b"\n")
+    return exit_code
+
+# Remove a socket left behind by a server that is no longer running,
+# refusing to remove anything else (such as a regular file given by mistake,
+# or the socket of a live server)
+def _remove_stale_socket(socket_path):
+    import stat
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"not a socket: {socket_path}")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        pass
+    else:
+        raise FileExistsError(f"a server is already listening on "
+                              f"{socket_path}")
+    finally:
+        probe.close()
+    os.unlink(socket_path)
+
+# Serve invocations of a component over a Unix domain socket
+def serve(component, socket_path, name=None):
+    import signal
+    if name is None:
+        name = os.path.basename(sys.argv[0])
+    _remove_stale_socket(socket_path)
+    _warm(component)
+    # Clean up the socket when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(socket.SOMAXCONN)
+    try:
+        while True:
+            conn, _ = listener.accept()
+            pid = os.fork()
+            if pid == 0:
+                # Worker process: handle a single request and exit
+                listener.close()
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                exit_code = 1
+                try:
+                    exit_code = _handle(component, conn, name)
+                finally:
+                    os._exit(exit_code & 0xff)
+            conn.close()
+            # Reap any finished workers
+            try:
+                while os.waitpid(-1, os.WNOHANG)[0]:
+                    pass
+            except ChildProcessError:
+                pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        os.unlink(socket_path)
+
+# Run an argument vector on a server and return the exit code
+def client(socket_path, argv):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(socket_path)
+    request = json.dumps({"argv": list(argv), "cwd": os.getcwd()})
+    socket.send_fds(conn, [request.encode() + b"\n"], [0, 1, 2])
+    reply = _recv_line(conn)
+    conn.close()
+    if not reply:
+        return 1
+    return json.loads(reply)["exit_code"]
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("usage: python -m ticli.server SOCKET [ARGS...]",
+              file=sys.stderr)
+        sys.exit(2)
+    sys.exit(client(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,166 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Streaming output of command results.
+
+Results that are iterators (including generators and asynchronous
+iterators) or lists and sets are written one line per item as the items are
+produced, in batches of buffered writes, instead of being collected and
+formatted in memory first.  Writes block while the reader is behind, which
+also pauses the producer.  If the reader closes the pipe, the producer is
+closed and the program exits with the status of a process killed by
+SIGPIPE.  Buffered lines are also written when nothing has been written for
+flush_interval seconds, even while the producer is blocked waiting for its
+next item.
+
+Line formats:
+
+  plain: str() of each item
+  jsonl: one JSON document per item (JSON Lines)
+  tsv: tab-separated fields for tuple, list, or dict items (dict items are
+    preceded by a header line holding the keys of the first item)
+"""
+
+import sys
+import json
+import threading
+import collections
+from collections.abc import AsyncIterator, Iterator
+
+# Number of characters collected before they are written
+buffer_size = 1 << 16
+
+# Time in seconds without a write after which buffered lines are written even
+# if the buffer is not full
+flush_interval = 0.1
+
+def _plain(item):
+    return str(item)
+
+def _jsonl(item):
+    return json.dumps(item, default=str, ensure_ascii=False)
+
+def _tsv_field(value):
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace(
+        "\n", "\\n").replace("\r", "\\r")
+
+def _tsv(item):
+    if isinstance(item, dict):
+        item = item.values()
+    elif not isinstance(item, (tuple, list)):
+        item = [item]
+    return "\t".join(_tsv_field(v) for v in item)
+
+formats = {
+    "plain": _plain,
+    "jsonl": _jsonl,
+    "tsv": _tsv,
+}
+
+# Return True if a result should be streamed rather than printed as a whole
+def is_streamable(result):
+    return isinstance(
+        result, (Iterator, AsyncIterator, list, set, frozenset))
+
+# Stop writing to a closed pipe, making sure the final flush of stdout at
+# exit does not fail as well
+def _discard_output(file):
+    import os
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, file.fileno())
+        os.close(devnull)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+# Queue of lines written in batches by the producer, and by a background
+# thread if the producer has not written for flush_interval seconds (so that
+# lines still appear while the producer is blocked).  The producer only
+# appends to the queue, which needs no lock.  Errors from writes in the
+# background are left in error, which the producer checks for each item.
+class _Line_Writer:
+    def __init__(self, file):
+        self.file = file
+        self.lines = collections.deque()
+        self.lock = threading.Lock()
+        self.written = False
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._write_when_idle,
+                                       daemon=True)
+        self.thread.start()
+
+    def _write_lines(self):
+        with self.lock:
+            n = len(self.lines)
+            if n:
+                popleft = self.lines.popleft
+                self.file.write("\n".join([popleft() for _ in range(n)])
+                                + "\n")
+            self.file.flush()
+            self.written = True
+
+    def write(self):
+        if self.error is not None:
+            raise self.error
+        self._write_lines()
+
+    def _write_when_idle(self):
+        while not self.stopped.wait(flush_interval):
+            if self.written or not self.lines:
+                self.written = False
+                continue
+            try:
+                self._write_lines()
+            except Exception as exc:
+                self.error = exc
+                return
+
+    # Stop the background thread and write any remaining lines
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        self.write()
+
+# Write the items of a result incrementally in the given format
+def write_stream(items, format="plain", file=None):
+    import signal
+    if file is None:
+        file = sys.stdout
+    if isinstance(items, AsyncIterator):
+        from .aio import iterate
+        items = iterate(items)
+    format_item = formats[format]
+    writer = _Line_Writer(file)
+    append = writer.lines.append
+    size = 0
+    try:
+        try:
+            for i, item in enumerate(items):
+                if i == 0 and format == "tsv" and isinstance(item, dict):
+                    append(_tsv(list(item)))
+                if writer.error is not None:
+                    raise writer.error
+                line = format_item(item)
+                append(line)
+                size += len(line) + 1
+                if size >= buffer_size:
+                    writer.write()
+                    size = 0
+        except BaseException:
+            # Keep the output produced before the failure
+            try:
+                writer.close()
+            except OSError:
+                pass
+            raise
+        writer.close()
+    except BrokenPipeError:
+        if hasattr(items, "close"):
+            items.close()
+        _discard_output(file)
+        raise SystemExit(128 + getattr(signal, "SIGPIPE", 13))
@@ -0,0 +1,92 @@
+# This software is copyrighted and licensed under the terms of the MIT
+# license.  See the LICENSE file found in the top-level directory of this
+# distribution for copyright information and license terms.
+
+# Author: Jeff Webb <jeff.webb@codecraftsmen.org>
+
+"""
+Structured tracing hooks.
+
+Ticli emits named events ("decorate", "init", "option-set", "validate",
+"call", and "chain-step") with their start time, duration, and a dictionary
+of event data.  Instrumented code checks the module-level "enabled" flag
+before doing any tracing work, so tracing costs nothing unless a subscriber
+is attached.
+
+Subscribers are callables invoked as callback(name, start, duration, data),
+with times in seconds from time.perf_counter().
+
+Setting the TICLI_TRACE environment variable to a file name records all
+events of a run in that file in the Chrome trace-event format.
+"""
+
+import os
+import time
+
+# True when at least one subscriber is attached
+enabled = False
+
+_subscribers = []
+
+# Clock used for event start times
+now = time.perf_counter
+
+def subscribe(callback):
+    global enabled
+    _subscribers.append(callback)
+    enabled = True
+
+def unsubscribe(callback):
+    global enabled
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+    enabled = bool(_subscribers)
+
+# Report an event that started at the given time and ends now
+def emit(name, start, **data):
+    duration = now() - start
+    for callback in list(_subscribers):
+        callback(name, start, duration, data)
+
+# Subscriber that prints each event, used by ticli.enable_debug()
+def print_event(name, start, duration, data):
+    details = " ".join(f"{k}: {v}" for k, v in data.items())
+    print(f"[{name} {duration * 1e6:.1f} us] {details}")
+
+# Subscriber that records events in the Chrome trace-event format (viewable
+# with chrome://tracing or Perfetto)
+class Chrome_Trace:
+    def __init__(self):
+        import threading
+        self.events = []
+        self.pid = os.getpid()
+        self.get_ident = threading.get_ident
+
+    def __call__(self, name, start, duration, data):
+        self.events.append({
+            "name": name,
+            "cat": "ticli",
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": self.pid,
+            "tid": self.get_ident(),
+            "args": {k: repr(v) for k, v in data.items()},
+        })
+
+    def save(self, path):
+        import json
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events}, f)
+
+# Record events in Chrome trace-event format and write them to a file when
+# the program exits
+def trace_to_file(path):
+    import atexit
+    exporter = Chrome_Trace()
+    subscribe(exporter)
+    atexit.register(exporter.save, path)
+    return exporter
+
+if os.environ.get("TICLI_TRACE"):
+    trace_to_file(os.environ["TICLI_TRACE"])
@@ -4,4 +4,430 @@
 
 # Author: Jeff Webb <jeff.webb@codecraftsmen.org>
 
-from pydantic import FilePath, DirectoryPath
+import contextvars
+
+# Path annotations that require an existing file or directory.  The stdlib
+# validation backend checks them directly, and pydantic validates them as the
+# pydantic types of the same name, so pydantic is only imported if it is used.
+class _Path_Annotation:
+    pydantic_name = None
+
+    @classmethod
+    def _pydantic_type(cls):
+        import pydantic
+        return getattr(pydantic, cls.pydantic_name)
+
+    # Hook used by pydantic v1
+    @classmethod
+    def __get_validators__(cls):
+        yield from cls._pydantic_type().__get_validators__()
+
+    # Hook used by pydantic v2
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        return handler(cls._pydantic_type())
+
+class FilePath(_Path_Annotation):
+    pydantic_name = "FilePath"
+
+class DirectoryPath(_Path_Annotation):
+    pydantic_name = "DirectoryPath"
+
+# Option type restricted to a (possibly large) set of string choices, for
+# use in place of Literal.  The choices are given as an iterable, a callable
+# returning one, or a file holding one choice per line (blank lines and
+# lines starting with "#" are skipped), and are only loaded when first
+# needed.  Membership is checked with a hash set, and a sorted index serves
+# prefix completion.
+class Choice:
+    def __init__(self, values=None, file=None, name="choice"):
+        if (values is None) == (file is None):
+            raise ValueError("Choice requires either values or a file")
+        self.source = values if file is None else file
+        self.from_file = file is not None
+        self.name = name
+        self._values = None
+        self._sorted = None
+        self._parsed = None
+
+    def __repr__(self):
+        return f"Choice({self.name})"
+
+    def _load(self):
+        if self.from_file:
+            with open(self.source) as f:
+                values = [line.strip() for line in f]
+            values = [v for v in values if v and not v.startswith("#")]
+        elif callable(self.source):
+            values = self.source()
+        else:
+            values = self.source
+        return frozenset(str(v) for v in values)
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = self._load()
+        return self._values
+
+    def __contains__(self, value):
+        return value in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    # Return the choice matching a value, or None if there is none.  The
+    # value may also have been parsed from a command-line word by fire (so
+    # that the choice 1.10 arrives as the number 1.1), in which case it is
+    # looked up by the values the choices parse to.
+    def match(self, value):
+        if isinstance(value, str):
+            return value if value in self.values else None
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+           and str(value) in self.values:
+            return str(value)
+        try:
+            return self.parsed.get((type(value), value))
+        except TypeError:
+            # Unhashable value
+            return None
+
+    # Index from the (type, value) of each choice that fire parses into a
+    # value other than a string to the choice.  Values that several choices
+    # parse to are left out, as the original word is unknown.
+    @property
+    def parsed(self):
+        if self._parsed is None:
+            from .dispatch import parse_value
+            parsed = {}
+            ambiguous = set()
+            for v in self.values:
+                if v.isidentifier() and v not in ["True", "False", "None"]:
+                    continue
+                value = parse_value(v)
+                if isinstance(value, str):
+                    continue
+                key = (type(value), value)
+                try:
+                    if key in parsed:
+                        ambiguous.add(key)
+                    parsed[key] = v
+                except TypeError:
+                    # Unhashable value, such as a list
+                    continue
+            for key in ambiguous:
+                del parsed[key]
+            self._parsed = parsed
+        return self._parsed
+
+    # Return the choices starting with a prefix, in sorted order
+    def complete(self, prefix=""):
+        import bisect
+        if self._sorted is None:
+            self._sorted = sorted(self.values)
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = start
+        while end < len(self._sorted) and \
+              self._sorted[end].startswith(prefix):
+            end += 1
+        return self._sorted[start:end]
+
+    # Return up to n choices that are close to a (misspelled) value
+    def close_matches(self, value, n=3):
+        import difflib
+        return difflib.get_close_matches(str(value), self.values, n=n)
+
+    # Error message for a value that is not one of the choices
+    def error_message(self, value):
+        message = f"Input should be a valid {self.name}"
+        matches = self.close_matches(value)
+        if matches:
+            message += ", did you mean " + " or ".join(
+                repr(m) for m in matches) + "?"
+        return message
+
+    # Hook used by pydantic v2
+    def __get_pydantic_core_schema__(self, source_type, handler):
+        from pydantic_core import core_schema, PydanticCustomError
+        def validate(value):
+            result = self.match(value)
+            if result is None:
+                raise PydanticCustomError(
+                    "choice_error", self.error_message(value))
+            return result
+        return core_schema.no_info_plain_validator_function(validate)
+
+# Input file that is mapped into memory or read in chunks on demand, rather
+# than read up front
+class Mapped_File:
+    def __init__(self, path):
+        import os
+        self.path = os.fspath(path)
+        self._file = None
+        self._mmap = None
+
+    def __fspath__(self):
+        return self.path
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return f"Mapped_File({self.path!r})"
+
+    @property
+    def size(self):
+        import os
+        return os.stat(self.path).st_size
+
+    # Return the first n bytes of the file
+    def header(self, n):
+        with open(self.path, "rb") as f:
+            return f.read(n)
+
+    # Return a read-only memory map of the whole file (mapped once)
+    def mmap(self):
+        import mmap
+        if self._mmap is None:
+            self._file = open(self.path, "rb")
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    # Return a zero-copy view of the file contents
+    def memoryview(self):
+        if self.size == 0:
+            # Empty files cannot be mapped
+            return memoryview(b"")
+        return memoryview(self.mmap())
+
+    # Yield the file contents in chunks of the given size
+    def chunks(self, chunk_size=1 << 20):
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        return {"path": self.path, "_file": None, "_mmap": None}
+
+# Option type for large input files.  Validation only checks that the file
+# exists and, optionally, its size limits (in bytes) and leading magic
+# bytes, without reading the contents.  Validated arguments are converted to
+# Mapped_File objects; other values (such as option attributes, which keep
+# the supplied path) can be wrapped with Mapped_File(value).
+class LargeFile:
+    def __init__(self, min_size=None, max_size=None, magic=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.magic = magic
+
+    def __repr__(self):
+        return "LargeFile"
+
+    # Return (error_type, message) for an invalid value, or None
+    def problem(self, value):
+        import os
+        try:
+            path = os.fspath(value)
+            st = os.stat(path)
+        except TypeError:
+            return "path_type", "Input is not a valid path"
+        except (OSError, ValueError):
+            return "path_not_file", "Path does not point to a file"
+        import stat
+        if not stat.S_ISREG(st.st_mode):
+            return "path_not_file", "Path does not point to a file"
+        if self.min_size is not None and st.st_size < self.min_size:
+            return "file_too_small", \
+                f"File should be at least {self.min_size} bytes"
+        if self.max_size is not None and st.st_size > self.max_size:
+            return "file_too_large", \
+                f"File should be at most {self.max_size} bytes"
+        if self.magic is not None:
+            with open(path, "rb") as f:
+                if f.read(len(self.magic)) != self.magic:
+                    return "file_magic_mismatch", \
+                        f"File should start with {self.magic!r}"
+        return None
+
+    # Hook used by pydantic v2
+    def __get_pydantic_core_schema__(self, source_type, handler):
+        from pydantic_core import core_schema, PydanticCustomError
+        def validate(value):
+            problem = self.problem(value)
+            if problem is not None:
+                raise PydanticCustomError(*problem)
+            return value if isinstance(value, Mapped_File) else \
+                Mapped_File(value)
+        return core_schema.no_info_plain_validator_function(validate)
+
+# Kinds ("file", "dir", "other", or None if missing) of the paths looked up
+# in the current path_cache() context, keyed by absolute path (None outside
+# of one, where paths are looked up again for each validation)
+_path_kinds = contextvars.ContextVar("ticli_path_kinds", default=None)
+
+# Number of paths wanted from one directory at which the directory is listed
+# with os.scandir instead of calling os.stat for each path
+scandir_threshold = 16
+
+# Number of lookups at which they are spread over a thread pool (which pays
+# off on network filesystems), and the size of the pool
+parallel_threshold = 64
+max_workers = 16
+
+class _Path_Cache:
+    def __enter__(self):
+        # Nested contexts share the lookups of the outermost one
+        self.token = None
+        if _path_kinds.get() is None:
+            self.token = _path_kinds.set({})
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.token is not None:
+            _path_kinds.reset(self.token)
+
+# Return a context manager within which the results of path_kinds() are
+# reused.  ticli.Fire runs each invocation (and each line of a batch) in one,
+# so that the steps of a command chain share the lookups, which are dropped
+# when the invocation is done.
+def path_cache():
+    return _Path_Cache()
+
+def _kind_from_mode(mode):
+    import stat
+    if stat.S_ISREG(mode):
+        return "file"
+    if stat.S_ISDIR(mode):
+        return "dir"
+    return "other"
+
+def _stat_kinds(path):
+    import os
+    try:
+        return {path: _kind_from_mode(os.stat(path).st_mode)}
+    except (OSError, ValueError):
+        return {path: None}
+
+def _scan_kinds(directory, names):
+    import os
+    kinds = dict.fromkeys((os.path.join(directory, n) for n in names))
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name in names:
+                    try:
+                        # Only follows symbolic links with an extra stat
+                        kind = "file" if entry.is_file() else \
+                            "dir" if entry.is_dir() else "other"
+                    except OSError:
+                        kind = None
+                    kinds[os.path.join(directory, entry.name)] = kind
+    except (OSError, ValueError):
+        # The directory may still allow access to its entries without
+        # allowing them to be listed (execute but no read permission)
+        for path in kinds:
+            kinds.update(_stat_kinds(path))
+    return kinds
+
+# Return the kinds of a list of paths, looking up the ones not seen before
+# in the current path_cache() context in batches (one os.scandir per
+# directory holding many of them) and in parallel for large lists
+def path_kinds(paths):
+    import os
+    cache = _path_kinds.get()
+    if cache is None:
+        cache = {}
+    keys = [os.path.abspath(os.fspath(p)) for p in paths]
+    by_directory = {}
+    for key in keys:
+        if key not in cache:
+            directory, name = os.path.split(key)
+            by_directory.setdefault(directory, set()).add(name)
+    tasks = []
+    for directory, names in by_directory.items():
+        if len(names) >= scandir_threshold:
+            tasks.append((_scan_kinds, directory, names))
+        else:
+            tasks.extend((_stat_kinds, os.path.join(directory, n))
+                         for n in names)
+    if len(tasks) >= parallel_threshold:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers) as pool:
+            results = list(pool.map(lambda t: t[0](*t[1:]), tasks))
+    else:
+        results = [t[0](*t[1:]) for t in tasks]
+    for kinds in results:
+        cache.update(kinds)
+    return [cache[key] for key in keys]
+
+# Path-list annotations whose items must be existing files or directories,
+# for long lists such as expanded globs.  The items are checked with
+# path_kinds() and converted to pathlib.Path objects.
+class _Path_List_Annotation:
+    kind = None
+    error_type = None
+    message = None
+
+    # Return (paths, errors), with errors as (index, error_type, message)
+    # and paths None if there are any
+    @classmethod
+    def check(cls, values):
+        import os
+        import pathlib
+        errors = []
+        valid = []
+        for i, value in enumerate(values):
+            if isinstance(value, (str, os.PathLike)):
+                valid.append((i, value))
+            else:
+                errors.append((i, "path_type", "Input is not a valid path"))
+        kinds = path_kinds([value for i, value in valid])
+        for (i, value), kind in zip(valid, kinds):
+            if kind != cls.kind:
+                errors.append((i, cls.error_type, cls.message))
+        if errors:
+            return None, sorted(errors)
+        return [pathlib.Path(value) for value in values], errors
+
+    # Hook used by pydantic v2
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        from pydantic_core import core_schema, PydanticCustomError
+        def validate(values):
+            if not isinstance(values, (list, tuple)):
+                raise PydanticCustomError(
+                    "list_type", "Input should be a valid list")
+            paths, errors = cls.check(values)
+            if errors:
+                i, error_type, message = errors[0]
+                raise PydanticCustomError(
+                    error_type, f"{message} (item {i}: {values[i]})")
+            return paths
+        return core_schema.no_info_plain_validator_function(validate)
+
+class FilePathList(_Path_List_Annotation):
+    kind = "file"
+    error_type = "path_not_file"
+    message = "Path does not point to a file"
+
+class DirectoryPathList(_Path_List_Annotation):
+    kind = "dir"
+    error_type = "path_not_directory"
+    message = "Path does not point to a directory"
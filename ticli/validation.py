@@ -5,40 +5,164 @@
 # Author: Jeff Webb <jeff.webb@codecraftsmen.org>
 
 import sys
-import pydantic
+import functools
+from . import trace
 
-# Pull this symbol into the module namespace for use by others
-from pydantic import ValidationError
+# The validation backend (see ticli.backends) is selected and imported on
+# first use to keep startup fast
+_backend = None
 
-def validate_method_arguments(member):
-    import inspect
-    from makefun import with_signature
-    g = pydantic.validate_arguments(member)
-    @with_signature(inspect.signature(member))
-    def f(self, *args, **kw):
-        return g(self, *args, **kw)
-    f.__doc__ = member.__doc__
-    return f
+# Return the validation backend, selecting the stdlib backend (which falls
+# back to pydantic for other annotations) if none has been set
+def backend():
+    global _backend
+    if _backend is None:
+        from .backends import stdlib
+        _backend = stdlib
+    return _backend
+
+# Select a specific validation backend module
+def set_backend(b):
+    global _backend
+    _backend = b
+    clear_validator_cache()
+
+# Pull this symbol into the module namespace for use by others (lazily)
+def __getattr__(name):
+    if name == "ValidationError":
+        return backend().ValidationError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def validate_arguments(member):
+# Wrap a function (or method) so that its arguments are validated by a
+# validator compiled by the backend on first use, keeping the signature and
+# keeping the wrapper a coroutine function if the function is one.  The
+# event argument names the trace event reported for each call (or None).
+def _validated(member, event):
     import inspect
     from makefun import with_signature
-    g = pydantic.validate_arguments(member)
-    @with_signature(inspect.signature(member))
-    def f(*args, **kw):
-        return g(*args, **kw)
+    g = None
+    def compile():
+        nonlocal g
+        if g is None:
+            g = backend().compile_arguments_validator(member)
+        return g
+    name = member.__name__
+    if inspect.iscoroutinefunction(member):
+        async def f(*args, **kw):
+            if trace.enabled and event:
+                start = trace.now()
+                try:
+                    return await (g or compile())(*args, **kw)
+                finally:
+                    trace.emit(event, start, function=name)
+            return await (g or compile())(*args, **kw)
+    else:
+        def f(*args, **kw):
+            if trace.enabled and event:
+                start = trace.now()
+                try:
+                    return (g or compile())(*args, **kw)
+                finally:
+                    trace.emit(event, start, function=name)
+            return (g or compile())(*args, **kw)
+    f = with_signature(inspect.signature(member))(f)
     f.__doc__ = member.__doc__
+    f._compile_validator = compile
+    f._unvalidated = member
     return f
 
-# Name and signature inspired by the Typeguard package
+def validate_method_arguments(member, event="call"):
+    return _validated(member, event)
+
+def validate_arguments(member, event="call"):
+    return _validated(member, event)
+
+# Compile the validator of a function wrapped by validate_arguments or
+# validate_method_arguments ahead of its first call
+def precompile(f):
+    compile = getattr(f, "_compile_validator", None)
+    if compile:
+        compile()
+
+# Maximum number of compiled validators kept in the registry
+validator_cache_size = 1024
+
+def _compile_validator(arg_name, type_annotation):
+    return backend().compile_type_validator(arg_name, type_annotation)
+
+# Registry of compiled validators keyed by (arg_name, type_annotation), with
+# least-recently-used eviction once validator_cache_size entries are stored
+_cached_compile_validator = functools.lru_cache(
+    maxsize=validator_cache_size)(_compile_validator)
+
+def compile_validator(arg_name, type_annotation):
+    try:
+        return _cached_compile_validator(arg_name, type_annotation)
+    except TypeError:
+        # Unhashable annotation, so it cannot be cached
+        return _compile_validator(arg_name, type_annotation)
+
+# Return hit/miss counters and size information for the validator registry
+def validator_cache_info():
+    return _cached_compile_validator.cache_info()
+
+# Change the maximum size of the validator registry (clears the registry)
+def set_validator_cache_size(size):
+    global validator_cache_size, _cached_compile_validator
+    validator_cache_size = size
+    _cached_compile_validator = functools.lru_cache(
+        maxsize=size)(_compile_validator)
+
+def clear_validator_cache():
+    _cached_compile_validator.cache_clear()
+
+# Name and signature inspired by the Typeguard package.  Returns the value
+# converted to the annotated type.
 def check_type(arg_name, value, type_annotation):
-    default_value = None # does not matter
-    M = pydantic.create_model(
-        "Temp_Model",
-        **{arg_name: (type_annotation, default_value)})
-    M(**{arg_name: value})
+    start = trace.now() if trace.enabled else None
+    try:
+        validate = compile_validator(arg_name, type_annotation)
+        return validate(value)
+    finally:
+        if start is not None:
+            trace.emit("validate", start, names=[arg_name])
+
+# Model that validates any subset of the given arguments at once (the
+# underlying validator is compiled by the backend when first used)
+class _Arguments_Model:
+    def __init__(self, model_name, arg_types):
+        self.model_name = model_name
+        self.arg_types = arg_types
+        self.validate = None
+
+    def compile(self):
+        if self.validate is None:
+            self.validate = backend().compile_arguments_model(
+                self.model_name, self.arg_types)
+        return self.validate
+
+    def __call__(self, **values):
+        return (self.validate or self.compile())(values)
+
+def create_arguments_model(model_name, arg_types):
+    return _Arguments_Model(model_name, arg_types)
+
+# Validate several arguments in one pass, reporting all errors together
+def check_types(values, arguments_model):
+    start = trace.now() if trace.enabled else None
+    try:
+        arguments_model(**values)
+    finally:
+        if start is not None:
+            trace.emit("validate", start, names=list(values))
+
+# Raised after validation errors have been printed.  Derived from SystemExit
+# so that the program still exits quietly unless the exception is caught.
+class Invalid_Arguments(SystemExit):
+    def __init__(self, code=-1):
+        super().__init__(code)
 
-# Print ValidationError information from the pydantic package
+# Print ValidationError information from the validation backend
 def print_validation_error(exc, value=None, value_dict=None,
                            arg_names=None, arg_values=None):
     already_printed = []